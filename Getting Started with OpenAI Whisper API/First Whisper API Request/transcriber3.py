@@ -1,8 +1,12 @@
 # Making Your First Whisper API Request
 
+from concurrent.futures import ThreadPoolExecutor, wait
 from openai import OpenAI
 import requests
+import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # load environment variables
@@ -11,15 +15,151 @@ load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
+class DownloadProgress:
+    """Thread-safe byte counter that reports throughput about once a second"""
+    def __init__(self, total, already_done=0):
+        self.total = total
+        self.done = already_done
+        self.transferred = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.lock = threading.Lock()
+
+    def add(self, size):
+        with self.lock:
+            self.done += size
+            self.transferred += size
+            now = time.monotonic()
+            if now - self.last_report >= 1:
+                self.last_report = now
+                total = f"/{self.total / 1024 / 1024:.1f}" if self.total else ""
+                print(f"Downloaded {self.done / 1024 / 1024:.1f}{total}MB "
+                      f"({self.transferred / 1024 / 1024 / (now - self.started):.2f}MB/s)")
+
+    def finish(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        print(f"Downloaded {self.transferred / 1024 / 1024:.1f}MB in {elapsed:.1f}s "
+              f"({self.transferred / 1024 / 1024 / elapsed:.2f}MB/s)")
+
+
+def probe_download(url):
+    """Return (size, supports_ranges) for a URL, or (None, False) if the server won't say"""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None, False
+    size = int(response.headers.get('Content-Length', 0)) or None
+    return size, response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+
+def download_stream(url, part_path, supports_ranges, progress, chunk_size):
+    """Stream into part_path over one connection, resuming from its current size when possible"""
+    offset = os.path.getsize(part_path) if supports_ranges and os.path.exists(part_path) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+        if offset and response.status_code == 416:
+            return  # the .part file already holds the whole file
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            offset = 0  # the server sent the whole file, so start over
+        progress.done = offset
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for block in response.iter_content(chunk_size):
+                f.write(block)
+                progress.add(len(block))
+
+
+def download_range(url, part_path, byte_range, lock, progress, chunk_size):
+    """Fill one [start, end, done] byte range of part_path, continuing after `done` bytes"""
+    start, end, done = byte_range
+    if start + done > end:
+        return
+    with requests.Session() as session, session.get(
+        url, headers={'Range': f'bytes={start + done}-{end}'}, stream=True, timeout=30
+    ) as response:
+        if response.status_code != 206:
+            raise Exception(f"Server ignored the Range request (status {response.status_code})")
+        with open(part_path, 'r+b') as f:
+            f.seek(start + done)
+            for block in response.iter_content(chunk_size):
+                f.write(block)
+                f.flush()
+                with lock:
+                    byte_range[2] += len(block)
+                progress.add(len(block))
+    if start + byte_range[2] <= end:
+        # A connection closed early; the range resumes from `done` on the next run
+        raise Exception(f"Short response for bytes {start}-{end}: got {byte_range[2]} of {end - start + 1}")
+
+
+def download_file(url, file_path, connections=4, chunk_size=1024 * 1024, min_split_size=16 * 1024 * 1024):
+    """Download a URL to file_path with constant memory use
+
+    Data is streamed to `file_path + '.part'` in chunk_size buffers and renamed into
+    place once complete. Files of at least min_split_size are fetched as parallel byte
+    ranges when the server supports Range requests. An interrupted download resumes
+    from the .part file (and, for ranged downloads, the .part.json progress file).
+    """
+    if os.path.exists(file_path):
+        return file_path
+    part_path = file_path + '.part'
+    state_path = part_path + '.json'
+    size, supports_ranges = probe_download(url)
+    
+    if supports_ranges and size and size >= min_split_size and connections > 1:
+        state = None
+        if os.path.exists(state_path) and os.path.exists(part_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state.get('url') != url or state.get('size') != size:
+                state = None
+        if state is None:
+            step = -(-size // connections)
+            state = {
+                'url': url,
+                'size': size,
+                'ranges': [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+            }
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+        
+        lock = threading.Lock()
+        progress = DownloadProgress(size, sum(r[2] for r in state['ranges']))
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            futures = [
+                executor.submit(download_range, url, part_path, byte_range, lock, progress, chunk_size)
+                for byte_range in state['ranges']
+            ]
+            pending = futures
+            while pending:
+                # Checkpoint range progress so a crash loses at most a second of transfer
+                _, pending = wait(pending, timeout=1)
+                with lock, open(state_path, 'w') as f:
+                    json.dump(state, f)
+            for future in futures:
+                future.result()
+        missing = [r for r in state['ranges'] if r[2] != r[1] - r[0] + 1]
+        if missing:
+            raise Exception(f"Incomplete download: {len(missing)} byte ranges not fully received")
+    else:
+        progress = DownloadProgress(size)
+        download_stream(url, part_path, supports_ranges, progress, chunk_size)
+    
+    if size and os.path.getsize(part_path) != size:
+        raise Exception(f"Incomplete download: expected {size} bytes, got {os.path.getsize(part_path)}")
+    os.replace(part_path, file_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    progress.finish()
+    return file_path
+
+
 # URL of the mp3 file
 url = "https://dare.wisc.edu/wp-content/uploads/sites/1051/2008/04/Arthur.mp3"
 
 # TODO: Download the mp3 file from the URL
-response = requests.get(url)
-response.raise_for_status()
-file_path = "Arthur.mp3"
-with open(file_path, "wb") as f:
-    f.write(response.content)
+file_path = download_file(url, "Arthur.mp3")
 
 # TODO: Open the audio file in binary mode
 with open(file_path, "rb") as audio_file:
@@ -1,32 +1,125 @@
 # Implementing Error Handling and Retries with Python Decorators
 
+from email.utils import parsedate_to_datetime
 from functools import wraps
+import asyncio
+import inspect
+import threading
 import time
 import random
 
 
-def retry_on_exception(max_attempts, wait_time):
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Errors that will fail the same way no matter how often they are retried
+FATAL_EXCEPTIONS = (TypeError, AttributeError, KeyError, NotImplementedError, FileNotFoundError, PermissionError)
+
+
+class RetryBudget:
+    """A pool of retries shared by every call in one job, so a failing job can't retry forever"""
+    def __init__(self, max_retries):
+        self.remaining = max_retries
+        self.lock = threading.Lock()
+
+    def try_spend(self):
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def get_status_code(error):
+    """Return the HTTP status attached to an API error, if any"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def is_retryable(error):
+    """Classify an error as retryable (True) or fatal (False) by HTTP status and exception type"""
+    status = get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    return not isinstance(error, FATAL_EXCEPTIONS)
+
+
+def get_retry_after(error):
+    """Read the server's requested delay in seconds from Retry-After style headers, if present"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        retry_after = headers.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def get_retry_delay(error, attempt, wait_time, max_wait):
+    """Full-jitter exponential backoff, unless the server asked for a specific delay"""
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, max_wait)
+    return random.uniform(0, min(max_wait, wait_time * 2 ** (attempt - 1)))
+
+
+def retry_on_exception(max_attempts, wait_time, max_wait=60, budget=None):
+    """Retry a sync or async function on retryable errors
+
+    Delays grow exponentially from `wait_time` (capped at `max_wait`) with full jitter,
+    honour Retry-After headers, and stop early on fatal errors or once the shared
+    RetryBudget is spent.
+    """
+    def should_retry(error, attempt):
+        if attempt >= max_attempts or not is_retryable(error):
+            return False
+        return budget is None or budget.try_spend()
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempt = 0
+                while True:
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        attempt += 1
+                        if not should_retry(e, attempt):
+                            raise
+                        delay = get_retry_delay(e, attempt, wait_time, max_wait)
+                        print(f"Error: {e}. Retrying in {delay:.2f} seconds...")
+                        await asyncio.sleep(delay)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             # TODO: implement the retry logic
-            retries = 0
-            while retries < max_attempts:
+            attempt = 0
+            while True:
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    retries += 1
-                    if retries == max_attempts:
+                    attempt += 1
+                    if not should_retry(e, attempt):
                         raise
-                    print(f"Error: {e}. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-            return None
+                    delay = get_retry_delay(e, attempt, wait_time, max_wait)
+                    print(f"Error: {e}. Retrying in {delay:.2f} seconds...")
+                    time.sleep(delay)
         return wrapper
     return decorator
 
 
 # Example function using the decorator for retry logic
-@retry_on_exception(max_attempts=10, wait_time=1)
+@retry_on_exception(max_attempts=10, wait_time=1, max_wait=4)
 def check_random_number():
     num = random.randint(1, 10)
     if num <= 8:
@@ -36,4 +129,4 @@ def check_random_number():
 
 # Execute the function once, it will retry automatically
 response = check_random_number()
-print(response)
\ No newline at end of file
+print(response)
@@ -1,38 +1,346 @@
 # Your task is to modify the audio duration script so that it traverses the resources folder (non-recursively) and prints the audio durations for all files within that directory. Ensure you filter for only media files with appropriate extensions like .mp3, .mp4, .wav, etc.
 
-import subprocess
+import argparse
+import csv
+import json
+import math
+import mmap
 import os
+import sqlite3
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+PROBE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ffprobe_cache.sqlite3")
+PROBE_CACHE_MAX_ENTRIES = 10000
+
+VALID_EXTENSIONS = (".mp3", ".mp4", ".wav")
+MAX_CHUNK_SIZE_MB = 20  # chunk size used when splitting files over the API limit
+WHISPER_COST_PER_MINUTE = 0.006  # USD
+INVENTORY_FIELDS = ["path", "size", "duration", "bit_rate", "codec", "estimated_chunks", "estimated_cost"]
+
+
+class ProbeCache:
+    """On-disk LRU cache of ffprobe results keyed by (path, size, mtime)"""
+    def __init__(self, path=PROBE_CACHE_PATH, max_entries=PROBE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+
+    def _connect(self):
+        # A connection per call keeps the cache safe to share between threads and processes
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes (key TEXT PRIMARY KEY, info TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        return conn
+
+    @staticmethod
+    def make_key(file_path):
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def get(self, key):
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT info FROM probes WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE probes SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, key, info):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO probes (key, info, last_used) VALUES (?, ?, ?)",
+                    (key, json.dumps(info), time.time())
+                )
+                conn.execute(
+                    "DELETE FROM probes WHERE key IN "
+                    "(SELECT key FROM probes ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        finally:
+            conn.close()
+
+
+probe_cache = ProbeCache()
+
+
+def probe_media(file_path, cache=probe_cache):
+    """Get duration, bitrate, codecs and stream layout of a media file with a single ffprobe call
+
+    Results are memoized in `cache` (pass None to always run ffprobe).
+    """
+    key = ProbeCache.make_key(file_path)
+    if cache:
+        info = cache.get(key)
+        if info is not None:
+            return info
+    
+    output = subprocess.check_output(
+        [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", "format=duration,bit_rate,format_name,size",
+            "-show_entries", "stream=index,codec_type,codec_name,channels,sample_rate,width,height",
+            "-of", "json",
+            file_path
+        ],
+        stderr=subprocess.STDOUT,
+        universal_newlines=True
+    )
+    probe = json.loads(output)
+    media_format = probe.get("format", {})
+    info = {
+        "duration": float(media_format["duration"]),
+        "bit_rate": int(media_format["bit_rate"]) if "bit_rate" in media_format else None,
+        "size": int(media_format.get("size", os.path.getsize(file_path))),
+        "format": media_format.get("format_name"),
+        "streams": probe.get("streams", []),
+    }
+    
+    if cache:
+        cache.put(key, info)
+    return info
+
+
+# MPEG audio Layer III tables, indexed by the version bits of the frame header
+MP3_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2
+    0: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2.5
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+
+def wav_duration(data):
+    """Read the duration of a WAV file from its RIFF header"""
+    if data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack_from("<I", data, offset + 16)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streamed WAVs leave the data size unset, so fall back to the rest of the file
+            if chunk_size in (0, 0xFFFFFFFF):
+                chunk_size = len(data) - offset - 8
+            return min(chunk_size, len(data) - offset - 8) / byte_rate
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+# WAV format tag -> {bits per sample: FFmpeg codec name}
+WAV_CODECS = {
+    1: {8: "pcm_u8", 16: "pcm_s16le", 24: "pcm_s24le", 32: "pcm_s32le"},
+    3: {32: "pcm_f32le", 64: "pcm_f64le"},
+}
+
+
+def wav_codec(data):
+    """Name a WAV file's codec the way ffprobe does, from its fmt chunk"""
+    if data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        if chunk_id == b"fmt ":
+            format_tag = struct.unpack_from("<H", data, offset + 8)[0]
+            bits_per_sample = struct.unpack_from("<H", data, offset + 22)[0]
+            return WAV_CODECS.get(format_tag, {}).get(bits_per_sample)
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def iter_mp4_boxes(data, start, end):
+    """Yield (box_type, payload_start, box_end) for the MP4 boxes between start and end"""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def read_mp4_time_header(data, offset):
+    """Return (timescale, duration) from an mvhd or mdhd payload"""
+    version = data[offset]
+    if version == 1:
+        return struct.unpack_from(">IQ", data, offset + 20)
+    return struct.unpack_from(">II", data, offset + 12)
+
+
+def mp4_duration(data):
+    """Read the duration of an MP4 file from its mvhd atom, or the longest mdhd atom"""
+    for box_type, moov_start, moov_end in iter_mp4_boxes(data, 0, len(data)):
+        if box_type != b"moov":
+            continue
+        
+        track_durations = []
+        for child_type, child_start, child_end in iter_mp4_boxes(data, moov_start, moov_end):
+            if child_type == b"mvhd":
+                timescale, duration = read_mp4_time_header(data, child_start)
+                if timescale and duration:
+                    return duration / timescale
+            elif child_type == b"trak":
+                for trak_type, mdia_start, mdia_end in iter_mp4_boxes(data, child_start, child_end):
+                    if trak_type != b"mdia":
+                        continue
+                    for mdia_type, mdhd_start, _ in iter_mp4_boxes(data, mdia_start, mdia_end):
+                        if mdia_type == b"mdhd":
+                            timescale, duration = read_mp4_time_header(data, mdhd_start)
+                            if timescale and duration:
+                                track_durations.append(duration / timescale)
+        return max(track_durations) if track_durations else None
+    return None
+
+
+def mp3_duration(data):
+    """Read the duration of an MP3 file from its Xing/Info, VBRI or LAME header, or CBR frame math"""
+    audio_start = 0
+    if data[0:3] == b"ID3":
+        tag_size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        audio_start = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+    audio_end = len(data) - (128 if data[-128:-125] == b"TAG" else 0)
+    
+    # Find the first valid Layer III frame header
+    offset = audio_start
+    limit = min(audio_end - 4, audio_start + 64 * 1024)
+    while offset < limit:
+        if data[offset] == 0xFF and data[offset + 1] & 0xE0 == 0xE0:
+            header = struct.unpack_from(">I", data, offset)[0]
+            version = (header >> 19) & 0x3
+            layer = (header >> 17) & 0x3
+            bitrate_index = (header >> 12) & 0xF
+            sample_rate_index = (header >> 10) & 0x3
+            if version != 1 and layer == 1 and 0 < bitrate_index < 15 and sample_rate_index < 3:
+                break
+        offset += 1
+    else:
+        return None
+    
+    mono = (header >> 6) & 0x3 == 3
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    samples_per_frame = 1152 if version == 3 else 576
+    if version == 3:
+        side_info_size = 17 if mono else 32
+    else:
+        side_info_size = 9 if mono else 17
+    
+    xing_offset = offset + 4 + side_info_size
+    if data[xing_offset:xing_offset + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", data, xing_offset + 4)[0]
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", data, xing_offset + 8)[0]
+            samples = frames * samples_per_frame
+            # The LAME tag after the Xing fields records the encoder delay and padding
+            lame_offset = xing_offset + 8 + sum(size for flag, size in ((0x1, 4), (0x2, 4), (0x4, 100), (0x8, 4)) if flags & flag)
+            if data[lame_offset:lame_offset + 4] == b"LAME":
+                delay_padding = int.from_bytes(data[lame_offset + 21:lame_offset + 24], "big")
+                samples -= (delay_padding >> 12) + (delay_padding & 0xFFF)
+            return max(samples, 0) / sample_rate
+    
+    vbri_offset = offset + 4 + 32
+    if data[vbri_offset:vbri_offset + 4] == b"VBRI":
+        frames = struct.unpack_from(">I", data, vbri_offset + 14)[0]
+        return frames * samples_per_frame / sample_rate
+    
+    bitrate = MP3_BITRATES[version][bitrate_index] * 1000
+    return (audio_end - offset) * 8 / bitrate
+
+
+HEADER_PARSERS = {
+    ".mp3": mp3_duration,
+    ".mp4": mp4_duration,
+    ".m4a": mp4_duration,
+    ".mov": mp4_duration,
+    ".wav": wav_duration,
+}
+
+
+# Codecs implied by the container: an MP3 header parse already found a Layer III frame
+HEADER_CODECS = {
+    ".mp3": lambda data: "mp3",
+    ".wav": wav_codec,
+}
+
+
+def read_header_duration(file_path):
+    """Read the duration straight from the container header, or None if the format isn't supported"""
+    parser = HEADER_PARSERS.get(os.path.splitext(file_path)[1].lower())
+    if parser is None:
+        return None
+    
+    try:
+        with open(file_path, "rb") as f:
+            # Memory-mapping only pages in the header bytes the parser actually touches
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return parser(data)
+    except (ValueError, IndexError, struct.error, OSError):
+        return None
+
+
+def read_header_codec(file_path):
+    """Name the audio codec from the container header, or None if it takes ffprobe to tell"""
+    parser = HEADER_CODECS.get(os.path.splitext(file_path)[1].lower())
+    if parser is None:
+        return None
+    
+    try:
+        with open(file_path, "rb") as f:
+            return parser(f.read(64 * 1024))
+    except (ValueError, IndexError, struct.error, OSError):
+        return None
 
 
 def get_audio_duration(file_path):
     """Get the duration of an audio file using ffprobe"""
     # TODO: Given the media file path, calculate its duration by calling `ffmpeg` on it using `subprocess.check_output`
     if not os.path.exists(file_path):
-        print("File does not exist: {file_path}")
+        print(f"File does not exist: {file_path}")
         return None
     
-    try:
-        output = subprocess.check_output(
-            [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                file_path
-            ],
-            stderr=subprocess.STDOUT,
-            universal_newlines=True
-        )
-        duration = float(output.strip())
+    duration = read_header_duration(file_path)
+    if duration:
         return duration
-    except (subprocess.CalledProcessError, ValueError, FileNotFoundError) as e:
+    
+    try:
+        return probe_media(file_path)["duration"]
+    except (subprocess.CalledProcessError, ValueError, KeyError, FileNotFoundError) as e:
         print(f"Failed to get duration for {file_path}: {e}")
         return None
 
 def traverse_and_print_durations(directory):
     """Traverse the specified directory and print durations of media files"""
 
-    valid_extensions = ('.mp3', '.mp4', '.wav')
+    valid_extensions = VALID_EXTENSIONS
     # TODO: Use `os.listdir(directory)` to get all files in the directory
     try:
         for entry in os.listdir(directory):
@@ -45,5 +353,103 @@ def traverse_and_print_durations(directory):
         print(f"Directory not found: {directory}")
 
 
+def iter_media_files(directory, extensions=VALID_EXTENSIONS):
+    """Recursively yield media file paths under directory using os.scandir"""
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(extensions):
+                        yield entry.path
+        except (FileNotFoundError, PermissionError) as e:
+            print(f"Could not scan {current}: {e}", file=sys.stderr)
+
+
+def inventory_entry(file_path):
+    """Collect duration, size, bitrate, codec and a chunk/cost estimate for one media file"""
+    size = os.path.getsize(file_path)
+    # Headers answer most files without forking; ffprobe only runs when they can't
+    duration = read_header_duration(file_path)
+    codec = read_header_codec(file_path) if duration else None
+    bit_rate = int(size * 8 / duration) if duration else None
+    if not codec:
+        try:
+            info = probe_media(file_path)
+            duration = info["duration"]
+            bit_rate = info["bit_rate"]
+            codec = next(
+                (stream.get("codec_name") for stream in info["streams"] if stream.get("codec_type") == "audio"),
+                None
+            )
+        except (subprocess.CalledProcessError, ValueError, KeyError, FileNotFoundError):
+            pass
+    
+    return {
+        "path": file_path,
+        "size": size,
+        "duration": duration,
+        "bit_rate": bit_rate,
+        "codec": codec,
+        "estimated_chunks": max(1, math.ceil(size / (MAX_CHUNK_SIZE_MB * 1024 * 1024))),
+        "estimated_cost": round(duration / 60 * WHISPER_COST_PER_MINUTE, 4) if duration else None,
+    }
+
+
+def write_inventory(directory, output=sys.stdout, output_format="jsonl", max_workers=8):
+    """Probe every media file under directory on a thread pool and stream one record per file
+
+    Records are written in completion order as soon as each probe finishes, either as
+    JSON Lines or CSV. Returns the number of files written.
+    """
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=INVENTORY_FIELDS)
+        writer.writeheader()
+    
+    count = 0
+    
+    def emit(done):
+        nonlocal count
+        for future in done:
+            try:
+                record = future.result()
+            except OSError as e:
+                print(f"Failed to probe file: {e}", file=sys.stderr)
+                continue
+            if writer:
+                writer.writerow(record)
+            else:
+                output.write(json.dumps(record) + "\n")
+            count += 1
+        output.flush()
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Cap the number of queued probes so huge trees don't build an unbounded backlog
+        pending = set()
+        for file_path in iter_media_files(directory):
+            pending.add(executor.submit(inventory_entry, file_path))
+            if len(pending) >= max_workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                emit(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            emit(done)
+    
+    return count
+
+
 if __name__ == "__main__":
-    traverse_and_print_durations("resources")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Print media durations or write a media inventory")
+    parser.add_argument("directory", nargs="?", default="resources")
+    parser.add_argument("--format", choices=["text", "jsonl", "csv"], default="text")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    
+    if args.format == "text":
+        traverse_and_print_durations(args.directory)
+    else:
+        write_inventory(args.directory, output_format=args.format, max_workers=args.workers)
\ No newline at end of file
@@ -3,14 +3,70 @@
 
 # correction: chunks = split_media(file_path, 1) # 1Mb chunks
 
+import csv
+import glob
+import hashlib
+import json
 import math
 import os
 import subprocess
 import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from openai import OpenAI
+import httpx
+from openai import DefaultHttpxClient, OpenAI
 
-client = OpenAI()
+# Minimum size of the shared API connection pool; the first job sizes it up to its max_workers if larger
+OPENAI_POOL_SIZE = int(os.getenv('OPENAI_POOL_SIZE', 8))
+
+_client = None
+_client_lock = threading.Lock()
+
+# Per-job chunk journals live here so a restarted job can skip chunks it already paid for
+JOURNAL_DIR = os.path.join(tempfile.gettempdir(), 'transcription_journals')
+
+# Audio encoders for the speech transcode stage: codec name -> (FFmpeg encoder, file extension)
+SPEECH_CODECS = {
+    'opus': ('libopus', '.ogg'),
+    'mp3': ('libmp3lame', '.mp3'),
+}
+
+
+def get_client(pool_size=None, prewarm=False):
+    """Return the process-wide OpenAI client, creating it on first use
+
+    Every call shares one keep-alive connection pool (HTTP/2 when the `h2` package is
+    installed), so chunk uploads reuse warm connections instead of paying for a new
+    TLS handshake each. With prewarm=True the first connection is opened in the
+    background right away.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+            size = max(pool_size or 0, OPENAI_POOL_SIZE)
+            _client = OpenAI(http_client=DefaultHttpxClient(
+                http2=http2,
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size, keepalive_expiry=60)
+            ))
+            if prewarm or os.getenv('OPENAI_PREWARM'):
+                threading.Thread(target=prewarm_client, args=(_client,), daemon=True).start()
+    return _client
+
+
+def prewarm_client(client):
+    """Resolve DNS and complete the TLS handshake ahead of the first upload with a cheap request"""
+    try:
+        client.models.list()
+    except Exception as e:
+        print(f"Warning: Could not pre-warm the OpenAI connection: {e}")
 
 
 def run_command_with_output(cmd, desc=None):
@@ -51,8 +107,109 @@ def get_audio_duration(file_path):
         return None
 
 
-def split_media(file_path, chunk_size_mb=20):
-    """Split media file into chunks smaller than the API limit"""
+def atempo_filter(tempo):
+    """Build an atempo filter chain for the given speed-up, keeping each stage within 0.5-2.0"""
+    if tempo <= 0:
+        raise ValueError(f"Tempo must be positive, got {tempo}")
+    stages = []
+    while tempo > 2.0:
+        stages.append(2.0)
+        tempo /= 2.0
+    while tempo < 0.5:
+        stages.append(0.5)
+        tempo /= 0.5
+    stages.append(tempo)
+    return ','.join(f"atempo={stage:.6g}" for stage in stages)
+
+
+def transcode_for_speech(file_path, codec='opus', bitrate='24k', sample_rate=16000, tempo=1.0):
+    """Extract the audio track and downmix it to a low-bitrate mono file for transcription
+
+    A tempo other than 1.0 also speeds the audio up (or slows it down) by that factor.
+    """
+    if codec not in SPEECH_CODECS:
+        raise ValueError(f"Unsupported speech codec: {codec}")
+    encoder, ext = SPEECH_CODECS[codec]
+    
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+    temp_file.close()
+    
+    cmd = [
+        'ffmpeg',
+        '-i', file_path,
+        '-vn',
+        *(['-af', atempo_filter(tempo)] if tempo != 1.0 else []),
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-c:a', encoder,
+        '-b:a', bitrate,
+        '-y',
+        temp_file.name
+    ]
+    
+    try:
+        run_command_with_output(cmd, f"Transcoding audio to {codec} {bitrate} mono {sample_rate}Hz at {tempo}x")
+    except Exception:
+        cleanup_temp_files(temp_file.name)
+        raise
+    
+    print(f"Reduced {os.path.getsize(file_path) / 1024 / 1024:.2f}MB to {os.path.getsize(temp_file.name) / 1024 / 1024:.2f}MB")
+    return temp_file.name
+
+
+def segment_media(file_path, chunk_duration=None, segment_times=None):
+    """Split media file into chunks in a single FFmpeg pass using the segment muxer.
+
+    Cuts every chunk_duration seconds, or at the explicit segment_times if given.
+    Returns a list of (chunk_path, start_time, end_time) tuples, with the times
+    taken from the segment list FFmpeg writes for the actual cut points.
+    """
+    ext = os.path.splitext(file_path)[1]
+    prefix = os.path.join(tempfile.gettempdir(), f"chunk_{uuid.uuid4().hex}")
+    segment_list = f"{prefix}.csv"
+
+    cmd = [
+        'ffmpeg',
+        '-i', file_path,
+        # Audio and video only: data and subtitle tracks can make the segment muxer fail
+        '-map', '0:a?',
+        '-map', '0:v?',
+        '-c', 'copy',
+        '-f', 'segment',
+        *(
+            ['-segment_times', ','.join(f"{t:.3f}" for t in segment_times)]
+            if segment_times else ['-segment_time', str(chunk_duration)]
+        ),
+        '-segment_list', segment_list,
+        '-segment_list_type', 'csv',
+        '-reset_timestamps', '1',
+        '-y',
+        f"{prefix}_%03d{ext}"
+    ]
+
+    try:
+        run_command_with_output(cmd, "Extracting all chunks in a single pass")
+
+        segments = []
+        with open(segment_list, newline='') as f:
+            for name, start_time, end_time in csv.reader(f):
+                segments.append((
+                    os.path.join(os.path.dirname(prefix), name),
+                    float(start_time),
+                    float(end_time)
+                ))
+        return segments
+    except Exception:
+        # Remove the chunks FFmpeg already wrote before it failed
+        for chunk_path in glob.glob(f"{glob.escape(prefix)}_*{ext}"):
+            cleanup_temp_files(chunk_path)
+        raise
+    finally:
+        cleanup_temp_files(segment_list)
+
+
+def plan_chunk_duration(file_path, chunk_size_mb=20):
+    """Estimate the chunk duration and chunk count for the given chunk size"""
     duration = get_audio_duration(file_path)
     
     if not duration:
@@ -61,31 +218,145 @@ def split_media(file_path, chunk_size_mb=20):
     file_size = os.path.getsize(file_path)
     chunk_duration = duration * (chunk_size_mb * 1024 * 1024) / file_size
     num_chunks = math.ceil(duration / chunk_duration)
+    return chunk_duration, num_chunks
+
+
+def measure_frame_energy(file_path, sample_rate=16000, frame_ms=20):
+    """Decode audio to mono PCM through an FFmpeg pipe and return the mean energy of each frame"""
+    import numpy as np
+    
+    cmd = [
+        'ffmpeg',
+        '-v', 'error',
+        '-i', file_path,
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 's16le',
+        'pipe:1'
+    ]
+    
+    frame_len = sample_rate * frame_ms // 1000
+    block_size = frame_len * 2 * 500  # 500 frames of 16-bit samples per read
+    energies = []
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    try:
+        pending = b''
+        while True:
+            block = process.stdout.read(block_size)
+            if not block:
+                break
+            pending += block
+            usable = len(pending) - len(pending) % (frame_len * 2)
+            samples = np.frombuffer(pending[:usable], dtype=np.int16).astype(np.float32)
+            energies.append((samples.reshape(-1, frame_len) ** 2).mean(axis=1))
+            pending = pending[usable:]
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+    
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, cmd)
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+
+def find_silence_cuts(file_path, cut_points, tolerance=2.0, frame_ms=20):
+    """Move each cut point to the quietest spot within `tolerance` seconds of it"""
+    import numpy as np
+    
+    energy = measure_frame_energy(file_path, frame_ms=frame_ms)
+    if not len(energy):
+        return cut_points
+    
+    # Average over ~100 ms so a single quiet frame inside a word doesn't count as a gap
+    window = max(1, 100 // frame_ms)
+    smoothed = np.convolve(energy, np.ones(window) / window, mode='same')
+    frames_per_second = 1000 / frame_ms
+    
+    cuts = []
+    previous_frame = 0
+    for cut_point in cut_points:
+        low = max(previous_frame + 1, int((cut_point - tolerance) * frames_per_second))
+        high = min(len(smoothed), int((cut_point + tolerance) * frames_per_second) + 1)
+        if low >= high:
+            cuts.append(cut_point)
+            continue
+        previous_frame = low + int(np.argmin(smoothed[low:high]))
+        cuts.append(previous_frame / frames_per_second)
+    return cuts
+
+
+def plan_chunk_boundaries(file_path, chunk_size_mb=20, speech_aware=False, tolerance=2.0):
+    """Return chunk boundary times [0, t1, ..., end] for the given chunk size
+
+    With speech_aware=True, each inner cut is moved to the nearest low-energy gap
+    within `tolerance` seconds of its size-derived position.
+    """
+    chunk_duration, num_chunks = plan_chunk_duration(file_path, chunk_size_mb)
+    cut_points = [i * chunk_duration for i in range(1, num_chunks)]
+    if speech_aware and cut_points:
+        cut_points = find_silence_cuts(file_path, cut_points, tolerance)
+    return [0.0] + cut_points + [num_chunks * chunk_duration]
+
+
+def extract_chunk(file_path, start_time, chunk_duration, chunk_id, num_chunks):
+    """Extract a single chunk into a temporary file and return its path"""
+    temp_file = tempfile.NamedTemporaryFile(
+        delete=False,
+        suffix=os.path.splitext(file_path)[1]
+    )
+    
+    # -ss before -i seeks the input, so FFmpeg doesn't read everything before the chunk
+    cmd = [
+        'ffmpeg',
+        '-ss', str(start_time),
+        '-i', file_path,
+        '-t', str(chunk_duration),
+        '-c', 'copy',
+        '-y',
+        temp_file.name
+    ]
+    
+    try:
+        run_command_with_output(
+            cmd, 
+            f"Extracting chunk {chunk_id + 1}/{num_chunks}"
+        )
+    except Exception:
+        cleanup_temp_files(temp_file.name)
+        raise
+    return temp_file.name
+
+
+def iter_media_chunks(file_path, chunk_size_mb=20, speech_aware=False):
+    """Yield (chunk_id, num_chunks, chunk_path) as soon as FFmpeg finishes each chunk
+
+    Yields nothing when the file fits in a single chunk.
+    """
+    boundaries = plan_chunk_boundaries(file_path, chunk_size_mb, speech_aware)
+    num_chunks = len(boundaries) - 1
+    if num_chunks == 1:
+        return
+    
+    for i in range(num_chunks):
+        start_time, end_time = boundaries[i], boundaries[i + 1]
+        yield i, num_chunks, extract_chunk(file_path, start_time, end_time - start_time, i, num_chunks)
+
+
+def split_media(file_path, chunk_size_mb=20, single_pass=False, speech_aware=False):
+    """Split media file into chunks smaller than the API limit"""
+    boundaries = plan_chunk_boundaries(file_path, chunk_size_mb, speech_aware)
+    num_chunks = len(boundaries) - 1
     
     chunks = []
-    if not (num_chunks == 1):
+    if single_pass and num_chunks > 1:
+        for chunk_id, (chunk, start_time, end_time) in enumerate(segment_media(file_path, segment_times=boundaries[1:-1])):
+            print(f"Chunk {chunk_id + 1}: {start_time:.2f}s - {end_time:.2f}s")
+            chunks.append(chunk)
+    elif not (num_chunks == 1):
         for i in range(num_chunks):
-            start_time = i * chunk_duration
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix=os.path.splitext(file_path)[1]
-            )
-            
-            cmd = [
-                'ffmpeg',
-                '-i', file_path,
-                '-ss', str(start_time),
-                '-t', str(chunk_duration),
-                '-c', 'copy',
-                '-y',
-                temp_file.name
-            ]
-            
-            run_command_with_output(
-                cmd, 
-                f"Extracting chunk {i + 1}/{num_chunks}"
-            )
-            chunks.append(temp_file.name)
+            start_time, end_time = boundaries[i], boundaries[i + 1]
+            chunks.append(extract_chunk(file_path, start_time, end_time - start_time, i, num_chunks))
     print(f"Split media into {len(chunks)} chunk(s): {chunks}")
     return chunks
 
@@ -110,7 +381,7 @@ def transcribe_small_media(file_path):
     """Transcribe an media file using OpenAI's Whisper API"""
     try:
         with open(file_path, 'rb') as media_file:
-            transcript = client.audio.transcriptions.create(
+            transcript = get_client().audio.transcriptions.create(
                 model="whisper-1",
                 file=media_file,
                 timeout=60
@@ -120,32 +391,309 @@ def transcribe_small_media(file_path):
         raise Exception(f"Transcription failed: {str(e)}")
 
 
-def transcribe(file_path):
-    """ Transcribe a large media file by splitting it into chunks """
+def transcribe_small_media_segments(file_path, tempo=1.0, chunk_start=0.0):
+    """Transcribe a media file and return its segments on the original timeline
+
+    `tempo` is the speed-up applied before upload and `chunk_start` is where this
+    chunk begins in the processed file, so each timestamp maps back as
+    (chunk_start + t) * tempo.
+    """
+    try:
+        with open(file_path, 'rb') as media_file:
+            transcript = get_client().audio.transcriptions.create(
+                model="whisper-1",
+                file=media_file,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"],
+                timeout=60
+            )
+    except Exception as e:
+        raise Exception(f"Transcription failed: {str(e)}")
+    
+    return [
+        {
+            'start': (chunk_start + segment.start) * tempo,
+            'end': (chunk_start + segment.end) * tempo,
+            'text': segment.text,
+        }
+        for segment in transcript.segments or []
+    ]
+
+
+def transcribe_segments(file_path, tempo=1.0, max_workers=1, speech_aware=False):
+    """Transcribe in chunks and return timestamped segments on the original timeline
+
+    Each chunk's start comes from the planned chunk boundaries, so segment times stay
+    continuous across chunks, and `tempo` scales them back to the original speed.
+    """
+    boundaries = plan_chunk_boundaries(file_path, 1, speech_aware) # 1Mb chunks
+    num_chunks = len(boundaries) - 1
+    if num_chunks == 1:
+        print("File small enough, transcribing without splitting...")
+        return transcribe_small_media_segments(file_path, tempo)
+    
+    def process_chunk(chunk_id):
+        start_time, end_time = boundaries[chunk_id], boundaries[chunk_id + 1]
+        chunk = extract_chunk(file_path, start_time, end_time - start_time, chunk_id, num_chunks)
+        try:
+            print(f"Transcribing chunk {chunk_id + 1}/{num_chunks} via Whisper API...")
+            return transcribe_small_media_segments(chunk, tempo, chunk_start=start_time)
+        finally:
+            cleanup_temp_files(chunk)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(process_chunk, chunk_id) for chunk_id in range(num_chunks)]
+        try:
+            chunk_segments = [future.result() for future in futures]
+        except Exception:
+            # The job has failed, so don't pay for uploads that haven't started yet
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return [segment for segments in chunk_segments for segment in segments]
+
+
+def transcribe_chunk(chunk, chunk_id, num_chunks, max_retries=3, wait_time=1):
+    """Transcribe a single chunk with retries, returning its text and elapsed seconds"""
+    start = time.monotonic()
+    for attempt in range(1, max_retries + 1):
+        try:
+            print(f"Transcribing chunk {chunk_id + 1}/{num_chunks} via Whisper API...")
+            return transcribe_small_media(chunk), time.monotonic() - start
+        except Exception as e:
+            print(f"Error on chunk {chunk_id + 1} (attempt {attempt}): {e}")
+            if attempt < max_retries:
+                time.sleep(wait_time)
+    return None, time.monotonic() - start
+
+
+def file_sha256(file_path):
+    """Hash a file's contents in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkJournal:
+    """On-disk record of each chunk's time range, status and text for one transcription job"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.chunks = json.load(f)['chunks']
+        except (FileNotFoundError, ValueError, KeyError):
+            self.chunks = {}
+
+    @classmethod
+    def for_job(cls, file_path, params, directory=JOURNAL_DIR):
+        """Open the journal for this media content and these processing parameters"""
+        os.makedirs(directory, exist_ok=True)
+        job_id = hashlib.sha256(
+            (file_sha256(file_path) + json.dumps(params, sort_keys=True)).encode()
+        ).hexdigest()
+        return cls(os.path.join(directory, f"{job_id}.json"))
+
+    def completed_text(self, chunk_id, start_time, end_time):
+        """Return the text of a chunk already transcribed over the same range, or None"""
+        entry = self.chunks.get(str(chunk_id))
+        if (entry and entry['status'] == 'done'
+                and round(entry['start'], 3) == round(start_time, 3)
+                and round(entry['end'], 3) == round(end_time, 3)):
+            return entry['text']
+        return None
+
+    def record(self, chunk_id, start_time, end_time, status, text=None):
+        with self.lock:
+            self.chunks[str(chunk_id)] = {
+                'start': start_time,
+                'end': end_time,
+                'status': status,
+                'text': text,
+            }
+            # Write to a temp file and rename so a crash never leaves a truncated journal
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'chunks': self.chunks}, f)
+            os.replace(temp_path, self.path)
+
+    def delete(self):
+        """Remove the journal once the job has finished, since it holds the full transcript"""
+        with self.lock:
+            cleanup_temp_files(self.path)
+
+
+def transcribe_journaled(file_path, journal, max_workers=1, speech_aware=False):
+    """Transcribe chunk by chunk, recording progress in the journal and skipping finished chunks
+
+    Returns None if any chunk still failed, so a re-run only redoes those chunks.
+    """
+    boundaries = plan_chunk_boundaries(file_path, 1, speech_aware) # 1Mb chunks
+    num_chunks = len(boundaries) - 1
+    
+    def process_chunk(chunk_id):
+        start_time, end_time = boundaries[chunk_id], boundaries[chunk_id + 1]
+        text = journal.completed_text(chunk_id, start_time, end_time)
+        if text is not None:
+            print(f"Chunk {chunk_id + 1}/{num_chunks} already transcribed, skipping")
+            return text
+        
+        if num_chunks == 1:
+            chunk = file_path
+        else:
+            chunk = extract_chunk(file_path, start_time, end_time - start_time, chunk_id, num_chunks)
+        try:
+            text, elapsed = transcribe_chunk(chunk, chunk_id, num_chunks)
+            print(f"Chunk {chunk_id + 1}/{num_chunks} finished in {elapsed:.2f}s")
+            journal.record(chunk_id, start_time, end_time, 'done' if text is not None else 'failed', text)
+            return text
+        finally:
+            if chunk != file_path:
+                cleanup_temp_files(chunk)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        transcriptions = list(executor.map(process_chunk, range(num_chunks)))
+    
+    failed = [chunk_id + 1 for chunk_id, text in enumerate(transcriptions) if text is None]
+    if failed:
+        print(f"Chunks {failed} failed; re-run the job to retry only those chunks")
+        return None
+    journal.delete()
+    return ' '.join(text for text in transcriptions if text)
+
+
+def transcribe_pipelined(file_path, max_workers=2, queue_size=2, speech_aware=False):
+    """Transcribe chunks while FFmpeg is still producing the later ones
+
+    Splitting runs at most max_workers + queue_size chunks ahead of transcription,
+    and every chunk is removed as soon as its transcription finishes.
+    """
     chunks = []
+    futures = {}
+    transcriptions = {}
+    # One slot per chunk that has been produced but not yet transcribed
+    slots = threading.BoundedSemaphore(max_workers + queue_size)
+    failed = threading.Event()
+    
+    def release_slot(future):
+        if not future.cancelled() and future.exception() is not None:
+            failed.set()
+        slots.release()
+        cleanup_temp_files(chunks[futures[future]])
+    
     try:
-        chunks = split_media(file_path, 1) # 1Mb chunks
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                chunk_iter = iter_media_chunks(file_path, 1, speech_aware) # 1Mb chunks
+                while True:
+                    slots.acquire()
+                    # Stop splitting once a chunk has failed; as_completed re-raises its error
+                    item = next(chunk_iter, None) if not failed.is_set() else None
+                    if item is None:
+                        slots.release()
+                        break
+                    chunk_id, num_chunks, chunk = item
+                    chunks.append(chunk)
+                    future = executor.submit(transcribe_chunk, chunk, chunk_id, num_chunks)
+                    futures[future] = chunk_id
+                    future.add_done_callback(release_slot)
+                
+                for future in as_completed(futures):
+                    chunk_id = futures[future]
+                    text, elapsed = future.result()
+                    print(f"Chunk {chunk_id + 1}/{len(chunks)} finished in {elapsed:.2f}s")
+                    transcriptions[chunk_id] = text
+            except Exception:
+                # The job has failed, so don't pay for uploads that haven't started yet
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        
+        if not chunks:
+            print("File small enough, transcribing without splitting...")
+            return transcribe_small_media(file_path)
+        
+        return ' '.join(transcriptions[chunk_id] for chunk_id in sorted(transcriptions) if transcriptions[chunk_id])
+    finally:
+        for chunk in chunks:
+            cleanup_temp_files(chunk)
+
+
+def transcribe(file_path, max_workers=1, speech_codec=None, speech_bitrate='24k', pipelined=False,
+               speech_aware=False, tempo=1.0, resumable=False, segments=False, single_pass=False):
+    """ Transcribe a large media file by splitting it into chunks
+
+    If speech_codec is set ('opus' or 'mp3'), the audio is first transcoded to a
+    16 kHz mono file at speech_bitrate, and that file is planned and split instead.
+    With pipelined=True, chunks are transcribed while splitting is still running.
+    With speech_aware=True, chunk boundaries are moved into nearby silences.
+    A tempo above 1.0 (e.g. 1.25-2.0) is "fast mode": the audio is sped up in the
+    same transcode, cutting upload size and billed minutes by that factor.
+    With resumable=True, progress is journaled per chunk under JOURNAL_DIR and a
+    re-run of the same job only transcribes chunks that are missing or failed;
+    the journal is deleted once every chunk is done.
+    With segments=True, a list of {'start', 'end', 'text'} segments timed on the
+    original file's timeline is returned instead of plain text (segment jobs aren't journaled).
+    With single_pass=True, all chunks are cut in one FFmpeg pass with the segment muxer.
+    """
+    if tempo <= 0:
+        raise ValueError(f"Tempo must be positive, got {tempo}")
+    chunks = []
+    audio_path = None
+    # Size the shared connection pool for this job's workers before the first upload
+    get_client(pool_size=max_workers)
+    try:
+        journal = None
+        if resumable:
+            journal = ChunkJournal.for_job(file_path, {
+                'speech_codec': speech_codec,
+                'speech_bitrate': speech_bitrate,
+                'speech_aware': speech_aware,
+                'tempo': tempo,
+            })
+        
+        if speech_codec or tempo != 1.0:
+            audio_path = transcode_for_speech(file_path, speech_codec or 'mp3', speech_bitrate, tempo=tempo)
+            file_path = audio_path
+        
+        if segments:
+            return transcribe_segments(file_path, tempo, max_workers=max_workers, speech_aware=speech_aware)
+        if journal:
+            return transcribe_journaled(file_path, journal, max_workers=max_workers, speech_aware=speech_aware)
+        if pipelined:
+            return transcribe_pipelined(file_path, max_workers=max_workers, speech_aware=speech_aware)
+        
+        chunks = split_media(file_path, 1, single_pass=single_pass, speech_aware=speech_aware) # 1Mb chunks
         
         if not chunks:
             print("File small enough, transcribing without splitting...")
             return transcribe_small_media(file_path)            
             
-        transcriptions = []
+        # Each result is written back to its chunk's slot so the join keeps the original order
+        transcriptions = [None] * len(chunks)
         
-        for chunk_id, chunk in enumerate(chunks):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(transcribe_chunk, chunk, chunk_id, len(chunks)): chunk_id
+                for chunk_id, chunk in enumerate(chunks)
+            }
             try:
-                print(f"Transcribing chunk {chunk_id + 1}/{len(chunks)} via Whisper API...")
-                text = transcribe_small_media(chunk)
-            except Exception as e:
-                print(e)
-                text = None
-            if text:
-                transcriptions.append(text)
-        return ' '.join(transcriptions)
+                for future in as_completed(futures):
+                    chunk_id = futures[future]
+                    text, elapsed = future.result()
+                    print(f"Chunk {chunk_id + 1}/{len(chunks)} finished in {elapsed:.2f}s")
+                    transcriptions[chunk_id] = text
+            except Exception:
+                # The job has failed, so don't pay for uploads that haven't started yet
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        return ' '.join(text for text in transcriptions if text)
     except Exception as e:
         print(f"Error processing file: {e}")
         return None
     finally:
         # Clean up all chunks in finally block
         for chunk in chunks:
-            cleanup_temp_files(chunk)
\ No newline at end of file
+            cleanup_temp_files(chunk)
+        if audio_path:
+            cleanup_temp_files(audio_path)
\ No newline at end of file
@@ -1,7 +1,27 @@
+import mimetypes
 import os
-import tempfile
+import re
+import threading
+import time
 from urllib.parse import urlparse, parse_qs
 
+import requests
+
+from download_cache import download_cache
+
+
+MAX_MEDIA_DURATION_SECONDS = 40 * 60  # 40 minutes
+MAX_DOWNLOAD_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+
+# Whisper's price per audio minute, for job cost estimates
+WHISPER_COST_PER_MINUTE = 0.006
+
+# Preflight metadata is reused by the download for this long
+PREFLIGHT_CACHE_TTL = 10 * 60
+
+_preflight_cache = {}
+_preflight_lock = threading.Lock()
+
 
 class GoogleDriveService:
     @staticmethod
@@ -30,11 +50,97 @@ class GoogleDriveService:
         except Exception:
             return None
 
+    @staticmethod
+    def fetch_metadata(file_id):
+        """Read a shared file's name, type, size and video duration without downloading it
+
+        The Drive API (used when GOOGLE_API_KEY is set) reports the duration; otherwise the
+        download endpoint's response headers are read and the body is never fetched.
+        """
+        metadata = {'file_id': file_id, 'name': None, 'mime_type': None, 'size': None, 'duration': None}
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if api_key:
+            response = requests.get(
+                f"https://www.googleapis.com/drive/v3/files/{file_id}",
+                params={'fields': 'name,mimeType,size,videoMediaMetadata', 'key': api_key},
+                timeout=15
+            )
+            response.raise_for_status()
+            info = response.json()
+            duration_ms = (info.get('videoMediaMetadata') or {}).get('durationMillis')
+            metadata.update(
+                name=info.get('name'),
+                mime_type=info.get('mimeType'),
+                size=int(info['size']) if info.get('size') else None,
+                duration=int(duration_ms) / 1000 if duration_ms else None
+            )
+            return metadata
+        
+        download_url = f"https://drive.google.com/uc?id={file_id}&export=download"
+        with requests.get(download_url, stream=True, allow_redirects=True, timeout=15) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '').split(';')[0]
+            # Files too large for virus scanning answer with an HTML warning page instead
+            if content_type and content_type != 'text/html':
+                metadata['mime_type'] = content_type
+                metadata['size'] = int(response.headers.get('Content-Length', 0)) or None
+            match = re.search(r'filename="([^"]+)"', response.headers.get('Content-Disposition', ''))
+            if match:
+                metadata['name'] = match.group(1)
+        return metadata
+
+    @staticmethod
+    def preflight(url):
+        """Check a Drive link's size, type and duration before any media is downloaded
+
+        Raises ValueError for files that aren't media or are over the duration or size
+        limits. The metadata, with a Whisper cost estimate, is returned and kept for the
+        following download_file() call.
+        """
+        file_id = GoogleDriveService.get_file_id(url)
+        if not file_id:
+            raise ValueError("Invalid Google Drive URL")
+        
+        try:
+            metadata = GoogleDriveService.fetch_metadata(file_id)
+        except requests.RequestException as e:
+            raise ValueError(f"Could not read Google Drive file metadata: {e}")
+        
+        mime_type = metadata['mime_type']
+        if mime_type and not mime_type.startswith(('video/', 'audio/')):
+            raise ValueError(f"Google Drive file is not a video or audio file ({mime_type})")
+        duration = metadata['duration']
+        if duration and duration > MAX_MEDIA_DURATION_SECONDS:
+            raise ValueError(
+                f"Video duration ({duration / 60:.1f} minutes) exceeds the "
+                f"{MAX_MEDIA_DURATION_SECONDS // 60} minute limit"
+            )
+        if metadata['size'] and metadata['size'] > MAX_DOWNLOAD_SIZE:
+            raise ValueError(f"File size ({metadata['size'] / 1024 / 1024:.0f}MB) exceeds the download limit")
+        
+        metadata['estimated_cost'] = round(duration / 60 * WHISPER_COST_PER_MINUTE, 4) if duration else None
+        now = time.time()
+        with _preflight_lock:
+            # Drop preflights that were never followed by a download
+            expired = [key for key, (cached_at, _) in _preflight_cache.items() if now - cached_at > PREFLIGHT_CACHE_TTL]
+            for key in expired:
+                del _preflight_cache[key]
+            _preflight_cache[file_id] = (now, metadata)
+        return metadata
+
+    @staticmethod
+    def pop_preflight_info(file_id):
+        """Return and forget the cached preflight metadata for a file, if it is still fresh"""
+        with _preflight_lock:
+            cached = _preflight_cache.pop(file_id, None)
+        if cached and time.time() - cached[0] <= PREFLIGHT_CACHE_TTL:
+            return cached[1]
+        return None
+
     @staticmethod
     def download_file(url):
         """Download a video file from Google Drive public link"""
-        print("Downloading from Google Drive...")
-        
+        output = None
         try:
             import gdown
             
@@ -43,10 +149,19 @@ class GoogleDriveService:
             if not file_id:
                 raise ValueError("Invalid Google Drive URL")
             
-            # Create temporary file with .mp4 extension
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
-            output = temp_file.name
-            temp_file.close()
+            cached_path = download_cache.get(f"gdrive:{file_id}")
+            if cached_path:
+                GoogleDriveService.pop_preflight_info(file_id)
+                print(f"Using cached download: {cached_path}")
+                return cached_path
+            print("Downloading from Google Drive...")
+            
+            # Use the real extension when a preflight saw the file's type, otherwise .mp4
+            metadata = GoogleDriveService.pop_preflight_info(file_id) or {}
+            suffix = mimetypes.guess_extension(metadata.get('mime_type') or '') or '.mp4'
+            
+            # Create temporary file with the media's extension
+            output = download_cache.make_temp_path('gdrive_', suffix=suffix)
             
             # Construct the download URL
             download_url = f"https://drive.google.com/uc?id={file_id}"
@@ -59,11 +174,15 @@ class GoogleDriveService:
             # Verify the download
             if os.path.getsize(output) == 0:
                 raise ValueError("Downloaded file is empty")
-                
-            return output
+            if metadata.get('size') and os.path.getsize(output) != metadata['size']:
+                raise ValueError("Downloaded file size doesn't match the preflight metadata")
+            
+            return download_cache.put(f"gdrive:{file_id}", output)
             
         except Exception as e:
             print(f"\nError downloading from Google Drive: {str(e)}")
+            if output and os.path.exists(output):
+                os.remove(output)
             raise ValueError(
                 "Could not download from Google Drive. "
                 "Please ensure:\n"
@@ -0,0 +1,170 @@
+# Download cache shared by the Google Drive and LinkedIn services
+# Each lesson folder ships its own copy so the service next to it can import it;
+# copies sharing a directory still coordinate through the index lock file.
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:  # Windows: the index is then only locked between threads of one process
+    fcntl = None
+
+
+DOWNLOAD_CACHE_DIR = os.path.join("temp_resources", "download_cache")
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv('DOWNLOAD_CACHE_MAX_BYTES', 5 * 1024 * 1024 * 1024))  # 5GB
+
+# In-progress downloads older than this are assumed abandoned and removed by the janitor
+ORPHAN_MAX_AGE = 60 * 60
+
+# Files handed out this recently may still be transcribing, so eviction leaves them alone
+IN_USE_GRACE = 60 * 60
+
+
+class DownloadCache:
+    """Downloaded media keyed by source ID and stored under content-addressed names
+
+    index.json maps each source ID to the SHA-256 named file holding its content, so
+    media reached through several links is stored once. Least recently used files are
+    evicted once the cache grows past max_bytes, except files handed out within the
+    last IN_USE_GRACE seconds. Paths returned by get() and put() belong to the cache
+    and must not be deleted by the caller.
+
+    The index is guarded by a lock file, so every service and worker process sharing
+    the directory sees consistent entries.
+    """
+    def __init__(self, directory=DOWNLOAD_CACHE_DIR, max_bytes=DOWNLOAD_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.temp_dir = os.path.join(directory, 'tmp')
+        self.index_path = os.path.join(directory, 'index.json')
+        self.max_bytes = max_bytes
+        self.last_cleanup = 0.0
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock, open(self.index_path + '.lock', 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def make_temp_path(self, prefix, suffix=None, directory=False):
+        """Create a temp file or directory for an in-progress download inside the cache"""
+        os.makedirs(self.temp_dir, exist_ok=True)
+        if directory:
+            return tempfile.mkdtemp(prefix=prefix, dir=self.temp_dir)
+        handle, path = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=self.temp_dir)
+        os.close(handle)
+        return path
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(temp_path, self.index_path)
+
+    def get(self, source_id):
+        """Return the cached file for a source ID, or None"""
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(source_id)
+            if entry is None:
+                return None
+            path = os.path.join(self.directory, entry['file'])
+            if not os.path.exists(path):
+                del index[source_id]
+                path = None
+            else:
+                entry['last_used'] = time.time()
+            self._save_index(index)
+            return path
+
+    def put(self, source_id, file_path):
+        """Move a finished download into the cache and return its cached path"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        name = digest.hexdigest() + os.path.splitext(file_path)[1]
+        path = os.path.join(self.directory, name)
+        
+        with self._locked():
+            if os.path.exists(path):
+                os.remove(file_path)
+            else:
+                shutil.move(file_path, path)
+            index = self._load_index()
+            index[source_id] = {'file': name, 'size': os.path.getsize(path), 'last_used': time.time()}
+            self._evict(index, keep=name)
+            self._save_index(index)
+        self.clean_orphans()
+        return path
+
+    def _evict(self, index, keep=None):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        in_use_since = time.time() - IN_USE_GRACE
+        files = {}
+        for entry in index.values():
+            size, last_used = files.get(entry['file'], (entry['size'], 0))
+            files[entry['file']] = (size, max(last_used, entry['last_used']))
+        total = sum(size for size, _ in files.values())
+        for name, (size, last_used) in sorted(files.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if name == keep or last_used > in_use_since:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            for source_id in [sid for sid, entry in index.items() if entry['file'] == name]:
+                del index[source_id]
+            total -= size
+
+    def clean_orphans(self, max_age=ORPHAN_MAX_AGE, interval=10 * 60):
+        """Janitor: remove abandoned temp downloads and cache files no source ID points at
+
+        Runs at most once per `interval` seconds.
+        """
+        now = time.time()
+        if now - self.last_cleanup < interval or not os.path.isdir(self.temp_dir):
+            return
+        self.last_cleanup = now
+        with self._locked():
+            for entry in os.scandir(self.temp_dir):
+                try:
+                    if now - entry.stat().st_mtime > max_age:
+                        if entry.is_dir():
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                        else:
+                            os.remove(entry.path)
+                except OSError as e:
+                    print(f"Warning: Could not clean up {entry.path}: {e}")
+            referenced = {entry['file'] for entry in self._load_index().values()}
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name not in referenced and not entry.name.startswith('index.json'):
+                    try:
+                        os.remove(entry.path)
+                    except OSError as e:
+                        print(f"Warning: Could not clean up {entry.path}: {e}")
+
+
+# One instance per process, shared by every service that imports this module
+download_cache = DownloadCache()
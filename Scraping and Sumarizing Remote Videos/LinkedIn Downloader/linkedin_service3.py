@@ -1,9 +1,34 @@
 # Please keep in mind that in some countries, downloading and using LinkedIn videos might lead to legal consequences if done without proper authorization.
 import os
-import tempfile
+import re
+import shutil
+import threading
+import time
 from urllib.parse import urlparse
 import yt_dlp
 
+from download_cache import download_cache
+
+
+# yt-dlp format selectors: full video for the player, or the cheapest stream that still has audio
+VIDEO_FORMAT = 'mp4'
+AUDIO_ONLY_FORMAT = 'bestaudio/worst[acodec!=none]'
+
+# Speech codecs yt-dlp can extract to after an audio-only download
+SPEECH_CODECS = ('opus', 'mp3')
+
+MAX_MEDIA_DURATION_SECONDS = 40 * 60  # 40 minutes
+MAX_DOWNLOAD_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+
+# Whisper's price per audio minute, for job cost estimates
+WHISPER_COST_PER_MINUTE = 0.006
+
+# Preflight info is reused by the download for this long; LinkedIn's signed media URLs expire
+PREFLIGHT_CACHE_TTL = 10 * 60
+
+_preflight_cache = {}
+_preflight_lock = threading.Lock()
+
 
 class LinkedInService:
     @staticmethod
@@ -20,26 +45,122 @@ class LinkedInService:
             return False
 
     @staticmethod
-    def download_video(url):
-        """Download LinkedIn video using yt-dlp and return path to downloaded file"""
-        print("Downloading LinkedIn video...")
+    def get_activity_urn(url):
+        """Extract the activity URN from a LinkedIn post URL"""
+        match = re.search(r'activity[:-](\d+)', urlparse(url).path)
+        return f"urn:li:activity:{match.group(1)}" if match else None
+
+    @staticmethod
+    def preflight(url, audio_only=False):
+        """Read a post's media metadata without downloading it
+
+        Returns the title, duration, estimated download size, available formats and a
+        Whisper cost estimate, or raises ValueError for media over the duration or size
+        limits. The extracted info is kept so the following download_video() call with
+        the same profile skips extraction.
+        """
+        ytdlp_options = {
+            'format': AUDIO_ONLY_FORMAT if audio_only else VIDEO_FORMAT,
+            'quiet': True,
+            'no_warnings': True,
+        }
+        try:
+            with yt_dlp.YoutubeDL(ytdlp_options) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            raise ValueError(f"Failed to read LinkedIn video metadata: {repr(e)}")
+        
+        duration = info.get('duration')
+        selected_formats = info.get('requested_formats') or [info]
+        size = sum(f.get('filesize') or f.get('filesize_approx') or 0 for f in selected_formats) or None
+        if not size and duration and info.get('tbr'):
+            size = int(info['tbr'] * 1000 / 8 * duration)
+        
+        if duration and duration > MAX_MEDIA_DURATION_SECONDS:
+            raise ValueError(
+                f"Video duration ({duration / 60:.1f} minutes) exceeds the "
+                f"{MAX_MEDIA_DURATION_SECONDS // 60} minute limit"
+            )
+        if size and size > MAX_DOWNLOAD_SIZE:
+            raise ValueError(f"Video size ({size / 1024 / 1024:.0f}MB) exceeds the download limit")
+        
+        now = time.time()
+        with _preflight_lock:
+            # Drop preflights that were never followed by a download
+            expired = [key for key, (cached_at, _) in _preflight_cache.items() if now - cached_at > PREFLIGHT_CACHE_TTL]
+            for key in expired:
+                del _preflight_cache[key]
+            _preflight_cache[(url, audio_only)] = (now, info)
+        return {
+            'title': info.get('title'),
+            'duration': duration,
+            'size': size,
+            'formats': [
+                {key: f.get(key) for key in ('format_id', 'ext', 'acodec', 'vcodec', 'filesize', 'tbr')}
+                for f in info.get('formats') or []
+            ],
+            'estimated_cost': round(duration / 60 * WHISPER_COST_PER_MINUTE, 4) if duration else None,
+        }
+
+    @staticmethod
+    def pop_preflight_info(url, audio_only=False):
+        """Return and forget the cached preflight info for a URL, if it is still fresh"""
+        with _preflight_lock:
+            cached = _preflight_cache.pop((url, audio_only), None)
+        if cached and time.time() - cached[0] <= PREFLIGHT_CACHE_TTL:
+            return cached[1]
+        return None
+
+    @staticmethod
+    def download_video(url, audio_only=False, speech_codec=None, speech_bitrate='24k', concurrent_fragments=4):
+        """Download LinkedIn video using yt-dlp and return path to downloaded file
+
+        With audio_only=True only the best audio-only stream (or the smallest rendition
+        with audio) is fetched, which is all transcription needs. speech_codec ('opus' or
+        'mp3') then has yt-dlp convert it to a 16 kHz mono file at speech_bitrate.
+        Segmented (HLS/DASH) streams are fetched concurrent_fragments at a time.
+        """
+        if speech_codec and speech_codec not in SPEECH_CODECS:
+            raise ValueError(f"Unsupported speech codec: {speech_codec}")
+        # One cache entry per post and download profile
+        urn = LinkedInService.get_activity_urn(url)
+        source_id = urn and f"linkedin:{urn}:{'audio' if audio_only else 'video'}:{speech_codec}:{speech_bitrate}"
+        cached_path = download_cache.get(source_id) if source_id else None
+        if cached_path:
+            LinkedInService.pop_preflight_info(url, audio_only)
+            print(f"Using cached download: {cached_path}")
+            return cached_path
         
-        temp_dir = tempfile.mkdtemp()
+        print("Downloading LinkedIn audio..." if audio_only else "Downloading LinkedIn video...")
+        
+        temp_dir = download_cache.make_temp_path('linkedin_', directory=True)
         output_template = os.path.join(temp_dir, '%(title)s.%(ext)s')
         
         try:
             # TODO: Define yt-dlp options:
             ytdlp_options = {
-                'format': 'mp4', # mp4 format
+                'format': AUDIO_ONLY_FORMAT if audio_only else VIDEO_FORMAT,
                 'outtmpl': output_template, # template for the output file name
+                'concurrent_fragment_downloads': concurrent_fragments,
                 'quiet': True,
                 'no_warnings': True,
                 'progress': True,
             }
+            if audio_only and speech_codec:
+                ytdlp_options['postprocessors'] = [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': speech_codec,
+                    'preferredquality': speech_bitrate.rstrip('k'),
+                }]
+                ytdlp_options['postprocessor_args'] = {'extractaudio': ['-ac', '1', '-ar', '16000']}
 
             # TODO: Create `YoutubeDL` instance based on options and call a `download` method on it
             with yt_dlp.YoutubeDL(ytdlp_options) as ydl:
-                ydl.download([url])
+                info = LinkedInService.pop_preflight_info(url, audio_only)
+                if info:
+                    ydl.process_ie_result(info, download=True)
+                else:
+                    ydl.download([url])
 
             # TODO: Retrieve the downloaded file name based on the specified location
             # For easier search, you can use a temporary directory in the `outtmpl` property that's empty before calling `download`                
@@ -47,11 +168,16 @@ class LinkedInService:
             files = os.listdir(temp_dir)
             if not files:
                 raise Exception("No file downloaded")
-                
-            return os.path.join(temp_dir, files[0])
+            
+            file_path = os.path.join(temp_dir, files[0])
+            if source_id:
+                file_path = download_cache.put(source_id, file_path)
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            return file_path
             
             # TODO: Don't forget to handle potential errors and exceptions properly
             
         except Exception as e:
             print (f"Error downloading video: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
             raise ValueError(f"Failed to download LinkedIn video: {repr(e)}")
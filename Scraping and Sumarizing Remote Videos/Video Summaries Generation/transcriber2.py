@@ -1,102 +1,1142 @@
 # review summarization mechanism using LLM system and user prompts 
 
+import asyncio
+import bisect
+import collections
+import contextlib
+import hashlib
+import json
+import sqlite3
 import subprocess
-import math
 import os
+import random
 import tempfile
+import threading
 import time
-from openai import OpenAI
+try:
+    import fcntl
+except ImportError:  # Windows: rate limits are then only shared between threads of one process
+    fcntl = None
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from email.utils import parsedate_to_datetime
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+
+
+# Audio encoders for the speech transcode stage: codec name -> (FFmpeg encoder, file extension)
+SPEECH_CODECS = {
+    'opus': ('libopus', '.ogg'),
+    'mp3': ('libmp3lame', '.mp3'),
+}
+
+PROBE_CACHE_PATH = os.path.join("temp_resources", "ffprobe_cache.sqlite3")
+PROBE_CACHE_MAX_ENTRIES = 10000
+
+# Per-minute API limits shared by every worker on this machine; set a variable to 0 to disable that bucket
+RATE_LIMIT_STATE_PATH = os.path.join("temp_resources", "rate_limits.json")
+RATE_LIMITS = {
+    'whisper_requests': int(os.getenv('WHISPER_REQUESTS_PER_MINUTE', 50)),
+    'whisper_audio_minutes': int(os.getenv('WHISPER_AUDIO_MINUTES_PER_MINUTE', 0)),
+    'chat_requests': int(os.getenv('CHAT_REQUESTS_PER_MINUTE', 500)),
+    'chat_tokens': int(os.getenv('CHAT_TOKENS_PER_MINUTE', 30000)),
+}
+
+# Output options that let FFmpeg write a chunk to a non-seekable pipe, keyed by file extension
+PIPE_FORMATS = {
+    '.mp3': ['-f', 'mp3'],
+    '.ogg': ['-f', 'ogg'],
+    '.wav': ['-f', 'wav'],
+    '.webm': ['-f', 'webm'],
+    '.mp4': ['-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov'],
+    '.m4a': ['-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov'],
+}
+
+# One structured progress report parsed from `ffmpeg -progress` output
+FFmpegProgress = collections.namedtuple(
+    'FFmpegProgress', ['out_time', 'speed', 'bitrate', 'total_size', 'done']
+)
+
+
+def parse_ffmpeg_progress(fields):
+    """Build an FFmpegProgress from one block of `-progress` key=value pairs"""
+    def number(value, suffix=''):
+        try:
+            return float(value[:-len(suffix)] if suffix and value.endswith(suffix) else value)
+        except (TypeError, ValueError):
+            return None
+    
+    out_time_us = number(fields.get('out_time_us'))
+    total_size = number(fields.get('total_size'))
+    return FFmpegProgress(
+        out_time=out_time_us / 1_000_000 if out_time_us is not None else None,
+        speed=number(fields.get('speed', '').strip(), 'x'),
+        bitrate=number(fields.get('bitrate', '').strip(), 'kbits/s'),
+        total_size=int(total_size) if total_size is not None else None,
+        done=fields.get('progress') == 'end'
+    )
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Errors that will fail the same way no matter how often they are retried
+FATAL_EXCEPTIONS = (TypeError, AttributeError, KeyError, NotImplementedError, FileNotFoundError, PermissionError)
+
+
+def get_status_code(error):
+    """Return the HTTP status attached to an API error, if any"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def is_retryable(error):
+    """Classify an error as retryable (True) or fatal (False) by HTTP status and exception type"""
+    status = get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    return not isinstance(error, FATAL_EXCEPTIONS)
+
+
+def is_overload_error(error):
+    """True for errors that mean the API is saturated: rate limits, overload responses and timeouts"""
+    if get_status_code(error) in (429, 503, 504):
+        return True
+    return isinstance(error, TimeoutError) or 'Timeout' in type(error).__name__
+
+
+def get_retry_after(error):
+    """Read the server's requested delay in seconds from Retry-After style headers, if present"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        retry_after = headers.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def get_retry_delay(error, attempt, wait_time=2, max_wait=60):
+    """Full-jitter exponential backoff, unless the server asked for a specific delay"""
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, max_wait)
+    return random.uniform(0, min(max_wait, wait_time * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """A pool of retries shared by every call in one job, so a failing job can't retry forever"""
+    def __init__(self, max_retries):
+        self.remaining = max_retries
+        self.lock = threading.Lock()
+
+    def try_spend(self):
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class AsyncWaiter:
+    """An FFmpegScheduler queue entry for a coroutine, resolved on its own event loop"""
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.enqueued_at = time.monotonic()
+
+    def wake(self, waited):
+        self.loop.call_soon_threadsafe(self._resolve, waited)
+
+    def _resolve(self, waited):
+        if not self.future.done():
+            self.future.set_result(waited)
+
+
+class FFmpegScheduler:
+    """Process-wide limit on concurrent ffmpeg jobs with a first-come, first-served queue
+
+    Threads wait on a condition; coroutines wait on a future that release() resolves
+    on their event loop, so a queued async job doesn't hold a thread.
+    """
+    def __init__(self, max_jobs):
+        self.max_jobs = max_jobs
+        self.running = 0
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.completed_jobs = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _admitted(self, enqueued_at):
+        # Call with the condition held
+        self.running += 1
+        waited = time.monotonic() - enqueued_at
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def _wake(self):
+        """Hand free slots to async waiters at the head of the queue and wake waiting threads"""
+        while self.queue and isinstance(self.queue[0], AsyncWaiter) and self.running < self.max_jobs:
+            waiter = self.queue.popleft()
+            waiter.wake(self._admitted(waiter.enqueued_at))
+        self.condition.notify_all()
+
+    def acquire(self):
+        """Wait for this job's turn and a free slot, returning the seconds spent queued"""
+        ticket = object()
+        enqueued_at = time.monotonic()
+        with self.condition:
+            self.queue.append(ticket)
+            self.condition.wait_for(lambda: self.queue[0] is ticket and self.running < self.max_jobs)
+            self.queue.popleft()
+            waited = self._admitted(enqueued_at)
+            # The next job in line may also fit
+            self._wake()
+        return waited
+
+    def release(self):
+        with self.condition:
+            self.running -= 1
+            self.completed_jobs += 1
+            self._wake()
+
+    @contextlib.contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire_async(self):
+        """Acquire a slot from the event loop without blocking it or a worker thread"""
+        waiter = AsyncWaiter(asyncio.get_running_loop())
+        with self.condition:
+            self.queue.append(waiter)
+            self._wake()
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            with self.condition:
+                if waiter in self.queue:
+                    self.queue.remove(waiter)
+                    self._wake()
+                    raise
+            # The slot was already handed over, so give it back
+            self.release()
+            raise
+
+    def metrics(self):
+        with self.condition:
+            admitted = self.running + self.completed_jobs
+            return {
+                'max_jobs': self.max_jobs,
+                'running': self.running,
+                'queue_depth': len(self.queue),
+                'completed_jobs': self.completed_jobs,
+                'avg_wait_seconds': self.total_wait / admitted if admitted else 0.0,
+                'max_wait_seconds': self.max_wait,
+            }
+
+
+# Shared by every MediaProcessorService in the process so concurrent requests can't oversubscribe the CPU
+ffmpeg_scheduler = FFmpegScheduler(int(os.getenv('FFMPEG_MAX_JOBS', os.cpu_count() or 1)))
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent API calls
+
+    Each healthy call made while at least half the limit is in use raises the limit by
+    1/limit, so it grows by about one per round of calls. Overload errors and latency
+    spikes multiply it by `backoff`. Calls that started before the last cut report the
+    same congestion and don't cut it again.
+    Latency is modelled as a fixed `overhead` plus a cost per unit of `work`, e.g. per
+    audio minute for Whisper. Only calls of at least `min_work` update the per-unit cost,
+    since a few seconds of upload and queueing would dominate a short chunk.
+    """
+    def __init__(self, name, initial_limit=4, min_limit=1, max_limit=32, backoff=0.5,
+                 spike_factor=3.0, smoothing=0.1, overhead=2.0, min_work=1.0):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.spike_factor = spike_factor
+        self.smoothing = smoothing
+        self.overhead = overhead
+        self.min_work = min_work
+        self.in_flight = 0
+        self.latency = None
+        self.last_decrease = 0.0
+        self.last_decision = None
+        self.decisions = collections.Counter()
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Wait until a call fits under the current limit, returning its start time"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started, error=None, work=1.0):
+        now = time.monotonic()
+        elapsed = now - started
+        work = work or 1.0
+        with self.condition:
+            # Only grow a limit that is actually being used, or idle workers would inflate it forever
+            busy = self.in_flight >= self.limit / 2
+            self.in_flight -= 1
+            if error is not None:
+                if is_overload_error(error):
+                    self._decrease(started, now, 'overload')
+                else:
+                    self._decide('hold')
+            else:
+                expected = self.overhead + self.latency * work if self.latency is not None else None
+                spike = expected is not None and elapsed > expected * self.spike_factor
+                if work >= self.min_work:
+                    latency = max(elapsed - self.overhead, 0.0) / work
+                    self.latency = latency if self.latency is None else (
+                        self.latency + self.smoothing * (latency - self.latency)
+                    )
+                if spike:
+                    self._decrease(started, now, 'latency_spike')
+                elif not busy:
+                    self._decide('hold')
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                    self._decide('increase')
+            self.condition.notify_all()
+
+    def _decrease(self, started, now, reason):
+        if started < self.last_decrease:
+            self._decide('hold')
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.last_decrease = now
+        self._decide(reason)
+        print(f"{self.name} concurrency limit cut to {int(self.limit)} ({reason})")
+
+    def _decide(self, decision):
+        self.decisions[decision] += 1
+        self.last_decision = decision
+
+    @contextlib.contextmanager
+    def slot(self, work=1.0):
+        started = self.acquire()
+        try:
+            yield
+        except Exception as e:
+            self.release(started, e, work)
+            raise
+        self.release(started, None, work)
+
+    def metrics(self):
+        with self.condition:
+            return {
+                'name': self.name,
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'latency_per_work': self.latency,
+                'last_decision': self.last_decision,
+                'decisions': dict(self.decisions),
+            }
+
+
+# Shared by every MediaProcessorService in the process; the thread pools' max_workers still cap concurrency
+whisper_concurrency = AdaptiveConcurrencyLimiter(
+    'whisper', max_limit=int(os.getenv('WHISPER_MAX_CONCURRENCY', 16))
+)
+chat_concurrency = AdaptiveConcurrencyLimiter(
+    'chat', max_limit=int(os.getenv('CHAT_MAX_CONCURRENCY', 16))
+)
+
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client(prewarm=False):
+    """Return the process-wide OpenAI client, creating it on first use
+
+    All services share one keep-alive connection pool (HTTP/2 when the `h2` package is
+    installed), sized for the most concurrent Whisper and chat calls the limiters allow,
+    so chunk uploads reuse warm connections instead of each paying for a TLS handshake.
+    With prewarm=True the first connection is opened in the background right away.
+    """
+    global _openai_client
+    with _openai_client_lock:
+        if _openai_client is None:
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+            # Hedged requests bypass the Whisper limiter, so leave them a little headroom
+            pool_size = whisper_concurrency.max_limit + chat_concurrency.max_limit + 4
+            _openai_client = OpenAI(http_client=DefaultHttpxClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=60
+                )
+            ))
+            if prewarm or os.getenv('OPENAI_PREWARM'):
+                threading.Thread(target=prewarm_openai_client, args=(_openai_client,), daemon=True).start()
+    return _openai_client
+
+
+def prewarm_openai_client(client):
+    """Resolve DNS and complete the TLS handshake ahead of the first upload with a cheap request"""
+    try:
+        client.models.list()
+    except Exception as e:
+        print(f"Warning: Could not pre-warm the OpenAI connection: {e}")
+
+
+class HedgePolicy:
+    """Decides when a slow chunk upload gets a duplicate request
+
+    A hedge is sent once a call runs past `percentile` of recent latencies, and hedges
+    are capped at `max_hedge_ratio` of all requests to bound cost. Latency is modelled
+    as a fixed `overhead` plus a cost per audio minute learnt from calls of at least
+    `min_work`; shorter calls also wait at least the percentile of recent short calls.
+    """
+    def __init__(self, percentile=95, window=100, min_samples=10, max_hedge_ratio=0.05,
+                 overhead=2.0, min_work=1.0):
+        self.percentile = percentile
+        self.latencies = collections.deque(maxlen=window)
+        self.short_latencies = collections.deque(maxlen=window)
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.overhead = overhead
+        self.min_work = min_work
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.lock = threading.Lock()
+
+    def record(self, elapsed, work=1.0):
+        with self.lock:
+            if work >= self.min_work:
+                self.latencies.append(max(elapsed - self.overhead, 0.0) / work)
+            else:
+                self.short_latencies.append(elapsed)
+
+    def _percentile(self, samples):
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def hedge_delay(self, work=1.0):
+        """Seconds to wait before hedging a call of this much work, or None until enough calls are seen"""
+        with self.lock:
+            self.requests += 1
+            delays = []
+            if len(self.latencies) >= self.min_samples:
+                delays.append(self.overhead + self._percentile(self.latencies) * work)
+            if work < self.min_work and len(self.short_latencies) >= self.min_samples:
+                delays.append(self._percentile(self.short_latencies))
+            return max(delays) if delays else None
+
+    def can_hedge(self):
+        with self.lock:
+            return self.hedges + 1 <= self.requests * self.max_hedge_ratio
+
+    def record_hedge(self):
+        with self.lock:
+            self.hedges += 1
+
+    def record_hedge_win(self):
+        with self.lock:
+            self.hedge_wins += 1
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'hedge_rate': self.hedges / self.requests if self.requests else 0.0,
+            }
+
+
+class ByteBudget:
+    """Block producers until the number of bytes held in memory drops under a limit"""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, size):
+        # A single reservation larger than the limit is still let through once nothing else is held
+        with self.condition:
+            self.condition.wait_for(lambda: self.in_flight == 0 or self.in_flight + size <= self.max_bytes)
+            self.in_flight += size
+
+    def release(self, size):
+        with self.condition:
+            self.in_flight -= size
+            self.condition.notify_all()
+
+
+class SharedRateLimiter:
+    """Token buckets shared across threads and processes through a file-locked state file
+
+    `limits` maps a bucket name to its capacity per minute. Buckets refill continuously,
+    and a request only proceeds once every bucket it draws from has room.
+    """
+    def __init__(self, path=RATE_LIMIT_STATE_PATH, limits=RATE_LIMITS):
+        self.path = path
+        self.limits = {name: limit for name, limit in limits.items() if limit}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock, open(self.path, 'a+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def try_acquire(self, costs):
+        """Take `costs` from every bucket at once, or return the seconds to wait before trying again"""
+        costs = {name: amount for name, amount in costs.items() if name in self.limits and amount}
+        if not costs:
+            return 0.0
+        now = time.time()
+        with self._locked_state() as state:
+            levels = {}
+            wait = 0.0
+            for name, amount in costs.items():
+                capacity = self.limits[name]
+                # A cost bigger than the whole bucket waits for a full bucket instead of forever
+                amount = min(amount, capacity)
+                bucket = state.get(name, {'tokens': capacity, 'updated': now})
+                tokens = min(capacity, bucket['tokens'] + max(0.0, now - bucket['updated']) * capacity / 60)
+                levels[name] = (tokens, amount)
+                if tokens < amount:
+                    wait = max(wait, (amount - tokens) * 60 / capacity)
+            if wait:
+                return wait
+            for name, (tokens, amount) in levels.items():
+                state[name] = {'tokens': tokens - amount, 'updated': now}
+        return 0.0
+
+    def acquire(self, costs, desc=None):
+        """Block until every bucket in `costs` has room, then consume it"""
+        while True:
+            wait = self.try_acquire(costs)
+            if not wait:
+                return
+            if desc:
+                print(f"Rate limit reached, waiting {wait:.1f}s before {desc}")
+            time.sleep(wait)
+
+
+# Shared by every MediaProcessorService in the process; the state file extends that to other processes
+rate_limiter = SharedRateLimiter()
+
+
+class ProbeCache:
+    """On-disk LRU cache of ffprobe results keyed by (path, size, mtime)"""
+    def __init__(self, path=PROBE_CACHE_PATH, max_entries=PROBE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+
+    def _connect(self):
+        # A connection per call keeps the cache safe to share between threads and processes
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes (key TEXT PRIMARY KEY, info TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        return conn
+
+    @staticmethod
+    def make_key(file_path):
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def get(self, key):
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT info FROM probes WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE probes SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, key, info):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO probes (key, info, last_used) VALUES (?, ?, ?)",
+                    (key, json.dumps(info), time.time())
+                )
+                conn.execute(
+                    "DELETE FROM probes WHERE key IN "
+                    "(SELECT key FROM probes ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        finally:
+            conn.close()
+
+
+class OffsetMap:
+    """Map timestamps in silence-stripped audio back to the original timeline"""
+    def __init__(self, kept_ranges):
+        # kept_ranges: (original_start, original_end) spans that survive stripping, in order
+        self.kept_ranges = [tuple(kept_range) for kept_range in kept_ranges]
+        self.segments = []
+        stripped_start = 0.0
+        for original_start, original_end in kept_ranges:
+            self.segments.append((stripped_start, original_start))
+            stripped_start += original_end - original_start
+        self.kept_seconds = stripped_start
+
+    def to_original(self, stripped_time):
+        index = bisect.bisect_right([start for start, _ in self.segments], stripped_time) - 1
+        stripped_start, original_start = self.segments[max(index, 0)]
+        return original_start + (stripped_time - stripped_start)
+
+
+class DirectoryResultStore:
+    """Transcription results stored as one JSON file per key in a local directory"""
+    def __init__(self, directory=os.path.join("temp_resources", "transcription_cache")):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, record):
+        # Write to a temp name first so readers never see a half-written entry
+        temp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(record, f)
+        os.replace(temp_path, self._path(key))
+
+    def touch(self, key):
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """Return (key, size_in_bytes, last_used) for every stored result"""
+        result = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    result.append((entry.name[:-len('.json')], stat.st_size, stat.st_mtime))
+        return result
+
+
+class SQLiteResultStore:
+    """Transcription results stored in a single SQLite database"""
+    def __init__(self, path=os.path.join("temp_resources", "transcription_cache.sqlite3")):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, record TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def get(self, key):
+        rows = self._execute("SELECT record FROM results WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def put(self, key, record):
+        data = json.dumps(record)
+        self._execute(
+            "INSERT OR REPLACE INTO results (key, record, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, data, len(data.encode()), time.time())
+        )
+
+    def touch(self, key):
+        self._execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+
+    def delete(self, key):
+        self._execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def entries(self):
+        """Return (key, size_in_bytes, last_used) for every stored result"""
+        return self._execute("SELECT key, size, last_used FROM results")
+
+
+class TranscriptionCache:
+    """Content-addressed transcription cache with TTL and size-based LRU eviction
+
+    Keys combine a SHA-256 of the media bytes with the model and processing
+    parameters, so the same content is only transcribed once per configuration.
+    """
+    def __init__(self, store=None, max_bytes=100 * 1024 * 1024, ttl_seconds=30 * 24 * 3600):
+        self.store = store or DirectoryResultStore()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_path, model, params):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        digest.update(json.dumps({'model': model, 'params': params}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached record ({'text', 'details', 'created_at'}) for a key, or None"""
+        record = self.store.get(key)
+        if record is None:
+            return None
+        if self.ttl_seconds and time.time() - record['created_at'] > self.ttl_seconds:
+            self.store.delete(key)
+            return None
+        self.store.touch(key)
+        return record
+
+    def put(self, key, text, details=None):
+        """Store a transcription with JSON-serializable job details needed to reuse it"""
+        with self.lock:
+            self.store.put(key, {'text': text, 'details': details or {}, 'created_at': time.time()})
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used results until the store fits in max_bytes"""
+        entries = sorted(self.store.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self.store.delete(key)
+            total -= size
 
 
 class MediaProcessorService:
-    def __init__(self):
-        self.client = OpenAI()
+    def __init__(self, speech_codec=None, speech_bitrate='24k', speech_sample_rate=16000,
+                 strip_silence=False, silence_threshold_db=-40, min_silence_seconds=2.0,
+                 result_cache=None, job_retry_budget=10, rate_limiter=rate_limiter,
+                 whisper_limiter=whisper_concurrency, chat_limiter=chat_concurrency, hedge_policy=None,
+                 client=None):
+        # The shared client is only created on first use; pass `client` to use a specific one
+        self._client = client
+        # Set speech_codec to 'opus' or 'mp3' to upload a mono speech transcode instead of the original media
+        if speech_codec and speech_codec not in SPEECH_CODECS:
+            raise ValueError(f"Unsupported speech codec: {speech_codec}")
+        self.speech_codec = speech_codec
+        self.speech_bitrate = speech_bitrate
+        self.speech_sample_rate = speech_sample_rate
+        # Set strip_silence to cut silences longer than min_silence_seconds before upload
+        self.strip_silence = strip_silence
+        self.silence_threshold_db = silence_threshold_db
+        self.min_silence_seconds = min_silence_seconds
+        # Pass a TranscriptionCache to return repeat transcriptions without calling the API
+        self.result_cache = result_cache
+        # Total chunk retries allowed per transcription job, across all chunks
+        self.job_retry_budget = job_retry_budget
+        # Every API call takes its share of the per-minute limits here first; pass None to disable
+        self.rate_limiter = rate_limiter
+        # Adaptive limits on concurrent Whisper and chat calls
+        self.whisper_limiter = whisper_limiter
+        self.chat_limiter = chat_limiter
+        # Pass a HedgePolicy to duplicate chunk uploads that run much slower than recent ones
+        self.hedge_policy = hedge_policy
+        self.probe_cache = ProbeCache()
+
+    @property
+    def client(self):
+        return self._client or get_openai_client()
 
     def summarize_transcription(self, text):
         """Generate a concise summary of the transcription"""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert content analyst and summarizer with these capabilities:\n"
-                            "- Extracting key points while maintaining context\n"
-                            "- Identifying main themes and core messages\n"
-                            "- Preserving critical details while reducing length\n"
-                            "- Maintaining the original tone and intent\n"
-                            "- Organizing information hierarchically\n\n"
-                            "Format your summaries with:\n"
-                            "1. A one-sentence overview\n"
-                            "2. 2-3 key takeaways\n"
-                            "3. Important details or quotes (if any)"
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": (
-                            f"Create a structured summary of this transcription. "
-                            f"Focus on the core message and key points while maintaining "
-                            f"context and critical details.\n\n"
-                            f"Transcription:\n{text}"
-                        )
-                    }
-                ]
-            )
+            if self.rate_limiter:
+                # Roughly 4 characters per token for the prompt, plus room for the system prompt and reply
+                self.rate_limiter.acquire(
+                    {'chat_requests': 1, 'chat_tokens': len(text) // 4 + 1000}, desc="summarizing"
+                )
+            with self.chat_limiter.slot():
+                response = self.client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": (
+                                "You are an expert content analyst and summarizer with these capabilities:\n"
+                                "- Extracting key points while maintaining context\n"
+                                "- Identifying main themes and core messages\n"
+                                "- Preserving critical details while reducing length\n"
+                                "- Maintaining the original tone and intent\n"
+                                "- Organizing information hierarchically\n\n"
+                                "Format your summaries with:\n"
+                                "1. A one-sentence overview\n"
+                                "2. 2-3 key takeaways\n"
+                                "3. Important details or quotes (if any)"
+                            )
+                        },
+                        {
+                            "role": "user",
+                            "content": (
+                                f"Create a structured summary of this transcription. "
+                                f"Focus on the core message and key points while maintaining "
+                                f"context and critical details.\n\n"
+                                f"Transcription:\n{text}"
+                            )
+                        }
+                    ]
+                )
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error generating summary: {e}")
             return None
 
+    def acquire_whisper_slot(self, audio_seconds, desc=None):
+        """Wait for room under the Whisper request and audio-minute limits"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(
+                {'whisper_requests': 1, 'whisper_audio_minutes': (audio_seconds or 0) / 60}, desc=desc
+            )
+
     def run_command_with_output(self, cmd, desc=None):
         """Run a command and stream its output in real-time"""
         if desc:
             print(f"\n{desc}")
         
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
-        )
-        
-        output = []
-        for line in iter(process.stdout.readline, ''):
-            print(line, end='')
-            output.append(line)
-        
-        process.stdout.close()
-        return_code = process.wait()
+        with ffmpeg_scheduler.slot():
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                bufsize=1
+            )
+            
+            output = []
+            for line in iter(process.stdout.readline, ''):
+                print(line, end='')
+                output.append(line)
+            
+            process.stdout.close()
+            return_code = process.wait()
         
         if return_code != 0:
             raise subprocess.CalledProcessError(return_code, cmd)
         
         return ''.join(output)
 
-    def get_audio_duration(self, file_path):
-        """Get the duration of an audio file using ffprobe"""
+    def probe_media(self, file_path):
+        """Get duration, bitrate, codecs and stream layout of a media file with a single ffprobe call"""
+        key = ProbeCache.make_key(file_path)
+        info = self.probe_cache.get(key)
+        if info is not None:
+            return info
+        
         cmd = [
-            'ffprobe', 
+            'ffprobe',
             '-v', 'quiet',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
+            '-show_entries', 'format=duration,bit_rate,format_name,size',
+            '-show_entries', 'stream=index,codec_type,codec_name,channels,sample_rate,width,height',
+            '-of', 'json',
             file_path
         ]
+        probe = json.loads(subprocess.check_output(cmd))
+        media_format = probe.get('format', {})
+        info = {
+            'duration': float(media_format['duration']),
+            'bit_rate': int(media_format['bit_rate']) if 'bit_rate' in media_format else None,
+            'size': int(media_format.get('size', os.path.getsize(file_path))),
+            'format': media_format.get('format_name'),
+            'streams': probe.get('streams', []),
+        }
+        
+        self.probe_cache.put(key, info)
+        return info
+
+    async def run_command_async(self, cmd, on_progress=None, timeout=None, stderr_lines=50):
+        """Run an ffmpeg command on the event loop, reporting structured progress events
+
+        `on_progress` is called with an FFmpegProgress for every `-progress` block.
+        Only the last `stderr_lines` lines of stderr are kept for the error report.
+        On timeout, cancellation or any other error the process is killed before it propagates.
+        """
+        cmd = [cmd[0], '-nostats', '-progress', 'pipe:1', *cmd[1:]]
+        await ffmpeg_scheduler.acquire_async()
+        try:
+            await self._run_ffmpeg_process(cmd, on_progress, timeout, stderr_lines)
+        finally:
+            ffmpeg_scheduler.release()
+
+    async def _run_ffmpeg_process(self, cmd, on_progress, timeout, stderr_lines):
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stderr_tail = collections.deque(maxlen=stderr_lines)
+        
+        async def read_progress():
+            fields = {}
+            async for raw_line in process.stdout:
+                key, _, value = raw_line.decode(errors='replace').strip().partition('=')
+                fields[key] = value
+                if key == 'progress':
+                    if on_progress:
+                        on_progress(parse_ffmpeg_progress(fields))
+                    fields = {}
+        
+        async def read_stderr():
+            async for raw_line in process.stderr:
+                stderr_tail.append(raw_line.decode(errors='replace'))
+        
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(read_progress(), read_stderr(), process.wait()),
+                timeout
+            )
+        except BaseException:
+            # Includes errors raised by on_progress, which would otherwise leave ffmpeg running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=''.join(stderr_tail))
+
+    def get_audio_duration(self, file_path):
+        """Get the duration of an audio file using ffprobe"""
         try:
-            output = subprocess.check_output(cmd)
-            return float(output)
+            return self.probe_media(file_path)['duration']
         except Exception:
             return None
 
-    def split_audio(self, file_path, chunk_size_mb=20):
-        """Split audio file into chunks smaller than the API limit"""
+    def transcode_for_speech(self, file_path, audio_filter=None):
+        """Extract the audio track and downmix it to a low-bitrate mono file for transcription"""
+        codec = self.speech_codec or 'mp3'
+        encoder, ext = SPEECH_CODECS[codec]
+        
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+        temp_file_path = temp_file.name
+        temp_file.close()
+        
+        cmd = [
+            'ffmpeg',
+            '-i', file_path,
+            '-vn',
+            *(['-af', audio_filter] if audio_filter else []),
+            '-ac', '1',
+            '-ar', str(self.speech_sample_rate),
+            '-c:a', encoder,
+            '-b:a', self.speech_bitrate,
+            '-y',
+            temp_file_path
+        ]
+        
+        try:
+            self.run_command_with_output(
+                cmd,
+                f"Transcoding audio to {codec} {self.speech_bitrate} mono {self.speech_sample_rate}Hz:"
+            )
+        except Exception:
+            self.cleanup_temp_files(temp_file_path)
+            raise
+        
+        original_size = os.path.getsize(file_path)
+        transcoded_size = os.path.getsize(temp_file_path)
+        print(f"Reduced {original_size / 1024 / 1024:.2f}MB to {transcoded_size / 1024 / 1024:.2f}MB")
+        return temp_file_path
+
+    def detect_silences(self, file_path, duration=None):
+        """Return (start, end) spans of silence found by FFmpeg's silencedetect filter
+
+        A silence running to the end of the file closes at `duration`, probed if not given.
+        """
+        cmd = [
+            'ffmpeg',
+            '-i', file_path,
+            '-vn',
+            '-af', f"silencedetect=noise={self.silence_threshold_db}dB:d={self.min_silence_seconds}",
+            '-f', 'null',
+            '-'
+        ]
+        with ffmpeg_scheduler.slot():
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd)
+        
+        silences = []
+        silence_start = None
+        for line in result.stderr.splitlines():
+            if 'silence_start:' in line:
+                silence_start = float(line.split('silence_start:')[1].split()[0])
+            elif 'silence_end:' in line and silence_start is not None:
+                silences.append((silence_start, float(line.split('silence_end:')[1].split()[0])))
+                silence_start = None
+        if silence_start is not None:
+            duration = duration or self.get_audio_duration(file_path)
+            if duration:
+                silences.append((silence_start, duration))
+        return silences
+
+    def strip_silences(self, file_path, padding=0.25):
+        """Remove long silences from the audio, returning (stripped_path, offset_map, removed_seconds)
+
+        `padding` seconds of each silence are kept on both sides so speech isn't clipped.
+        When there is nothing worth removing, no file is written and the offset map is
+        the identity (or None if the duration can't be read).
+        """
+        duration = self.get_audio_duration(file_path)
+        if not duration:
+            return None, None, 0.0
+        cut_ranges = [
+            (start + padding, end - padding)
+            for start, end in self.detect_silences(file_path, duration)
+            if end - start > 2 * padding
+        ]
+        if not cut_ranges:
+            return None, OffsetMap([(0.0, duration)]), 0.0
+        
+        kept_ranges = []
+        position = 0.0
+        for start, end in cut_ranges:
+            kept_ranges.append((position, start))
+            position = end
+        kept_ranges.append((position, duration))
+        offset_map = OffsetMap(kept_ranges)
+        
+        # Commas are escaped so the expression survives filtergraph parsing
+        expression = '+'.join(f"between(t\\,{start:.3f}\\,{end:.3f})" for start, end in cut_ranges)
+        stripped_path = self.transcode_for_speech(
+            file_path,
+            audio_filter=f"aselect=not({expression}),asetpts=N/SR/TB"
+        )
+        
+        removed_seconds = duration - offset_map.kept_seconds
+        print(f"Removed {removed_seconds:.1f}s of silence ({removed_seconds / duration:.0%} of {duration:.1f}s)")
+        return stripped_path, offset_map, removed_seconds
+
+    def plan_chunks(self, file_path, max_bytes, headroom=0.05):
+        """Plan chunk time ranges that fit under max_bytes using the file's packet index
+
+        Reads every packet's timestamp and size with a single ffprobe call, builds a
+        cumulative byte table over all streams and cuts at the last keyframe packet
+        that still fits, keeping `headroom` of each chunk free for container overhead.
+        When the file has a video stream only its keyframes are cut points, since every
+        audio packet is flagged as a keyframe and a stream copy seeks to video keyframes.
+        Returns a list of (start_time, end_time) tuples covering the whole file.
+        """
+        # Cover art shows up as a single-frame video stream that can't be cut on
+        video_streams = {
+            stream['index'] for stream in self.probe_media(file_path)['streams']
+            if stream.get('codec_type') == 'video' and stream.get('codec_name') not in ('mjpeg', 'png', 'bmp')
+        }
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-show_entries', 'packet=stream_index,pts_time,size,flags',
+            '-of', 'csv=p=0',
+            file_path
+        ]
+        output = subprocess.check_output(cmd, universal_newlines=True)
+        
+        packets = []
+        for line in output.splitlines():
+            fields = line.strip().split(',')
+            if len(fields) < 4 or fields[1] == 'N/A':
+                continue
+            is_cut_point = 'K' in fields[3] and (not video_streams or int(fields[0]) in video_streams)
+            packets.append((float(fields[1]), int(fields[2]), is_cut_point))
+        
+        if not packets:
+            raise Exception("Could not read packet index")
+        
+        packets.sort()
+        duration = self.get_audio_duration(file_path) or packets[-1][0]
+        budget = max_bytes * (1 - headroom)
+        
+        # cumulative[i] is the number of bytes in packets[:i]
+        cumulative = [0]
+        for _, size, _ in packets:
+            cumulative.append(cumulative[-1] + size)
+        
+        ranges = []
+        start_index = 0
+        start_time = 0.0
+        while start_index < len(packets):
+            end_index = bisect.bisect_right(cumulative, cumulative[start_index] + budget) - 1
+            if end_index >= len(packets):
+                ranges.append((start_time, duration))
+                break
+            
+            while end_index > start_index and not packets[end_index][2]:
+                end_index -= 1
+            if end_index == start_index:
+                raise Exception(f"Cannot fit packet at {packets[start_index][0]:.2f}s into {max_bytes} bytes")
+            
+            end_time = packets[end_index][0]
+            ranges.append((start_time, end_time))
+            start_index = end_index
+            start_time = end_time
+        
+        return ranges
+
+    def plan_audio_chunks(self, file_path, chunk_size_mb=20):
+        """Validate the media and plan its chunks, returning (ranges, max_chunk_bytes)"""
         print("\nSplitting audio into chunks...")
         
         MAX_CHUNK_SIZE = 25 * 1024 * 1024  # 25MB in bytes
         MAX_MEDIA_DURATION_SECONDS = 40 * 60  # 40 minutes
-        file_size = os.path.getsize(file_path)
         duration = self.get_audio_duration(file_path)
         
         if not duration:
@@ -109,94 +1149,446 @@ class MediaProcessorService:
                 "for this demo application we're only transcribing videos up to 40 minutes long"
             )
         
-        chunk_duration = duration * (chunk_size_mb * 1024 * 1024) / file_size
-        num_chunks = math.ceil(duration / chunk_duration)
-        chunks = []
+        max_chunk_bytes = min(chunk_size_mb * 1024 * 1024, MAX_CHUNK_SIZE)
+        return self.plan_chunks(file_path, max_chunk_bytes), MAX_CHUNK_SIZE
+
+    def iter_audio_chunks(self, file_path, chunk_size_mb=20):
+        """Yield (chunk_number, total_chunks, chunk_path, duration) as soon as FFmpeg finishes each chunk"""
+        ranges, MAX_CHUNK_SIZE = self.plan_audio_chunks(file_path, chunk_size_mb)
+        original_ext = os.path.splitext(file_path)[1]
         
-        for current_chunk in range(num_chunks):
-            start_time = current_chunk * chunk_duration
-            original_ext = os.path.splitext(file_path)[1]
-            
+        for current_chunk, (start_time, end_time) in enumerate(ranges):
             temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=original_ext)
             temp_file_path = temp_file.name
             temp_file.close()
             
             cmd = [
                 'ffmpeg',
-                '-i', file_path,
                 '-ss', str(start_time),
-                '-t', str(chunk_duration),
+                '-i', file_path,
+                '-t', str(end_time - start_time),
                 '-c', 'copy',
                 '-y',
                 temp_file_path
             ]
             
-            self.run_command_with_output(cmd, f"Extracting chunk {current_chunk+1}/{num_chunks}:")
-            time.sleep(0.5)
+            try:
+                self.run_command_with_output(cmd, f"Extracting chunk {current_chunk+1}/{len(ranges)}:")
+                
+                chunk_size = os.path.getsize(temp_file_path)
+                if chunk_size > MAX_CHUNK_SIZE:
+                    raise Exception(f"Chunk {current_chunk+1} too large ({chunk_size/1024/1024:.1f}MB)")
+            except Exception:
+                self.cleanup_temp_files(temp_file_path)
+                raise
             
-            chunk_size = os.path.getsize(temp_file_path)
+            yield current_chunk + 1, len(ranges), temp_file_path, end_time - start_time
+
+    def iter_audio_chunks_in_memory(self, file_path, chunk_size_mb=20, budget=None, stop=None):
+        """Yield (chunk_number, total_chunks, (filename, data), duration) with each chunk piped from FFmpeg into memory
+
+        If a ByteBudget is given, MAX_CHUNK_SIZE is reserved before each chunk is produced and
+        trimmed to the chunk's real size afterwards; the consumer releases it once uploaded.
+        Production ends early once the `stop` event is set.
+        """
+        ranges, MAX_CHUNK_SIZE = self.plan_audio_chunks(file_path, chunk_size_mb)
+        original_ext = os.path.splitext(file_path)[1].lower()
+        if original_ext not in PIPE_FORMATS:
+            original_ext = '.mp4'
+        
+        for current_chunk, (start_time, end_time) in enumerate(ranges):
+            if budget:
+                budget.acquire(MAX_CHUNK_SIZE)
+            if stop is not None and stop.is_set():
+                if budget:
+                    budget.release(MAX_CHUNK_SIZE)
+                return
+            
+            cmd = [
+                'ffmpeg',
+                '-v', 'error',
+                '-ss', str(start_time),
+                '-i', file_path,
+                '-t', str(end_time - start_time),
+                '-c', 'copy',
+                *PIPE_FORMATS[original_ext],
+                'pipe:1'
+            ]
+            
+            print(f"\nExtracting chunk {current_chunk+1}/{len(ranges)} into memory:")
+            try:
+                with ffmpeg_scheduler.slot():
+                    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                if result.returncode != 0:
+                    print(result.stderr.decode(errors='replace'))
+                    raise subprocess.CalledProcessError(result.returncode, cmd)
+                
+                chunk_size = len(result.stdout)
+                if chunk_size > MAX_CHUNK_SIZE:
+                    raise Exception(f"Chunk {current_chunk+1} too large ({chunk_size/1024/1024:.1f}MB)")
+            except Exception:
+                if budget:
+                    budget.release(MAX_CHUNK_SIZE)
+                raise
+            
+            if budget:
+                budget.release(MAX_CHUNK_SIZE - chunk_size)
+            yield (current_chunk + 1, len(ranges), (f"chunk_{current_chunk+1}{original_ext}", result.stdout),
+                   end_time - start_time)
+
+    def split_audio(self, file_path, chunk_size_mb=20):
+        """Split audio file into chunks smaller than the API limit, returning (chunk_path, duration) pairs"""
+        return asyncio.run(self.split_audio_async(file_path, chunk_size_mb))
+
+    async def split_audio_async(self, file_path, chunk_size_mb=20, timeout=None):
+        """Extract every planned chunk concurrently on the event loop, returning (chunk_path, duration) pairs
+
+        The shared ffmpeg_scheduler bounds how many extractions run at once. If one
+        fails, the others are cancelled and every chunk file is removed.
+        """
+        ranges, MAX_CHUNK_SIZE = self.plan_audio_chunks(file_path, chunk_size_mb)
+        original_ext = os.path.splitext(file_path)[1]
+        
+        chunk_paths = []
+        for _ in ranges:
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=original_ext)
+            temp_file.close()
+            chunk_paths.append(temp_file.name)
+        
+        async def extract(i, start_time, end_time):
+            cmd = [
+                'ffmpeg',
+                '-v', 'error',
+                '-ss', str(start_time),
+                '-i', file_path,
+                '-t', str(end_time - start_time),
+                '-c', 'copy',
+                '-y',
+                chunk_paths[i]
+            ]
+            await self.run_command_async(cmd, timeout=timeout)
+            chunk_size = os.path.getsize(chunk_paths[i])
             if chunk_size > MAX_CHUNK_SIZE:
-                print(f"Chunk {current_chunk+1} too large ({chunk_size/1024/1024:.1f}MB), reducing duration...")
+                raise Exception(f"Chunk {i+1} too large ({chunk_size/1024/1024:.1f}MB)")
+            print(f"Extracted chunk {i+1}/{len(ranges)} ({chunk_size/1024/1024:.1f}MB)")
+        
+        tasks = [
+            asyncio.ensure_future(extract(i, start_time, end_time))
+            for i, (start_time, end_time) in enumerate(ranges)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for chunk_path in chunk_paths:
+                self.cleanup_temp_files(chunk_path)
+            raise
+        
+        return [(chunk_path, end_time - start_time) for chunk_path, (start_time, end_time) in zip(chunk_paths, ranges)]
+
+    def request_transcription(self, chunk, duration=None, limited=True):
+        """Send one Whisper request for a chunk path or (filename, data) tuple
+
+        Hedges pass limited=False: they are already capped by the hedge policy and must not
+        queue behind the very call they are meant to overtake.
+        """
+        with self.whisper_limiter.slot(work=duration / 60 if duration else 1.0) if limited \
+                else contextlib.nullcontext():
+            if isinstance(chunk, tuple):
+                return self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=chunk,
+                    timeout=60
+                )
+            with open(chunk, "rb") as audio_file:
+                return self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    timeout=60
+                )
+
+    def request_transcription_hedged(self, chunk, chunk_number, duration=None):
+        """Send a Whisper request and a duplicate if it runs past the hedge policy's latency percentile
+
+        The first successful response wins; the slower request is left to finish in the background.
+        """
+        work = duration / 60 if duration else 1.0
+        delay = self.hedge_policy.hedge_delay(work)
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary = executor.submit(self.request_transcription, chunk, duration)
+            pending = {primary}
+            if delay is not None:
+                done, _ = wait(pending, timeout=delay)
+                # Only hedges that are actually sent count towards the cap
+                hedge_allowed = not done and self.hedge_policy.can_hedge()
+                if hedge_allowed and (not self.rate_limiter or not self.rate_limiter.try_acquire(
+                        {'whisper_requests': 1, 'whisper_audio_minutes': (duration or 0) / 60})):
+                    print(f"Chunk {chunk_number} is slower than {delay:.2f}s, sending a hedged request")
+                    pending.add(executor.submit(self.request_transcription, chunk, duration, limited=False))
+                    self.hedge_policy.record_hedge()
+
+            error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is not primary:
+                            self.hedge_policy.record_hedge_win()
+                        self.hedge_policy.record(time.monotonic() - started, work)
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            executor.shutdown(wait=False)
+
+    def transcribe_chunk(self, chunk, chunk_number, total_chunks, max_retries=3, budget=None, duration=None):
+        """Transcribe a single chunk with retries, returning its text and elapsed seconds
+
+        `chunk` is either a file path or a (filename, data) tuple held in memory, and
+        `duration` is its planned length in seconds, used for rate and concurrency limits.
+        Only retryable errors are retried, with jittered exponential backoff or the
+        server's Retry-After delay, while the job's RetryBudget lasts.
+        """
+        start = time.monotonic()
+        retry_count = 0
+        
+        while True:
+            try:
+                self.acquire_whisper_slot(duration, desc=f"chunk {chunk_number}")
+                print(f"\nTranscribing chunk {chunk_number} of {total_chunks}...")
+                if self.hedge_policy:
+                    response = self.request_transcription_hedged(chunk, chunk_number, duration)
+                else:
+                    response = self.request_transcription(chunk, duration)
+                return response.text, time.monotonic() - start
+            except Exception as e:
+                retry_count += 1
+                print(f"Error on chunk {chunk_number} (attempt {retry_count}): {str(e)}")
+                if not is_retryable(e):
+                    print(f"Chunk {chunk_number} failed with a non-retryable error")
+                    raise
+                if retry_count == max_retries or (budget and not budget.try_spend()):
+                    print(f"Failed to transcribe chunk {chunk_number} after {retry_count} attempts")
+                    raise
+                delay = get_retry_delay(e, retry_count)
+                print(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+
+    def transcribe_chunks_pipelined(self, audio_file, max_workers=2, queue_size=2, budget=None):
+        """Transcribe chunks while FFmpeg is still producing the later ones
+
+        Splitting runs at most max_workers + queue_size chunks ahead of transcription,
+        and each chunk is deleted as soon as its transcription finishes.
+        """
+        chunks = []
+        futures = {}
+        full_transcription = {}
+        # One slot per chunk that has been produced but not yet transcribed
+        slots = threading.BoundedSemaphore(max_workers + queue_size)
+        failed = threading.Event()
+        
+        def release_slot(future):
+            if not future.cancelled() and future.exception() is not None:
+                failed.set()
+            slots.release()
+            self.cleanup_temp_files(chunks[futures[future]])
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    print(f"Warning: Could not delete oversized chunk: {e}")
-                chunk_duration *= 0.8
-                num_chunks = math.ceil(duration / chunk_duration)
-                continue
+                    chunk_iter = self.iter_audio_chunks(audio_file)
+                    while True:
+                        slots.acquire()
+                        # Stop splitting once a chunk has failed; as_completed re-raises its error
+                        item = next(chunk_iter, None) if not failed.is_set() else None
+                        if item is None:
+                            slots.release()
+                            break
+                        chunk_number, total_chunks, chunk_path, duration = item
+                        chunks.append(chunk_path)
+                        future = executor.submit(
+                            self.transcribe_chunk, chunk_path, chunk_number, total_chunks, budget=budget,
+                            duration=duration
+                        )
+                        futures[future] = len(chunks) - 1
+                        future.add_done_callback(release_slot)
+                    
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        text, elapsed = future.result()
+                        print(f"Chunk {i + 1} of {len(chunks)} transcribed in {elapsed:.2f}s")
+                        full_transcription[i] = text
+                except Exception:
+                    # The job has failed, so don't pay for uploads that haven't started yet
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+            
+            if not chunks:
+                raise Exception("Failed to split audio file into chunks")
             
-            chunks.append(temp_file_path)
+            return ' '.join(full_transcription[i] for i in range(len(chunks)))
+        finally:
+            for chunk_path in chunks:
+                self.cleanup_temp_files(chunk_path)
+
+    def transcribe_chunks_in_memory(self, audio_file, max_workers=1, max_bytes_in_flight=100 * 1024 * 1024,
+                                    budget=None):
+        """Transcribe chunks piped straight from FFmpeg without touching the disk
+
+        At most max_bytes_in_flight bytes of chunk data are held in memory at once;
+        splitting pauses until uploads free enough room for the next chunk.
+        """
+        futures = {}
+        full_transcription = {}
+        bytes_in_flight = ByteBudget(max_bytes_in_flight)
+        failed = threading.Event()
         
-        return chunks
+        def release_chunk(future):
+            if not future.cancelled() and future.exception() is not None:
+                failed.set()
+            bytes_in_flight.release(futures[future][1])
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                # Piping stops once a chunk has failed; as_completed re-raises its error
+                for chunk_number, total_chunks, chunk, duration in self.iter_audio_chunks_in_memory(
+                        audio_file, budget=bytes_in_flight, stop=failed):
+                    if failed.is_set():
+                        break
+                    future = executor.submit(
+                        self.transcribe_chunk, chunk, chunk_number, total_chunks, budget=budget, duration=duration
+                    )
+                    # Keep only the size here so the chunk data can be freed once it is uploaded
+                    futures[future] = (chunk_number - 1, len(chunk[1]))
+                    future.add_done_callback(release_chunk)
+                
+                for future in as_completed(futures):
+                    i = futures[future][0]
+                    text, elapsed = future.result()
+                    print(f"Chunk {i + 1} of {len(futures)} transcribed in {elapsed:.2f}s")
+                    full_transcription[i] = text
+            except Exception:
+                # The job has failed, so don't pay for uploads that haven't started yet
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        
+        if not futures:
+            raise Exception("Failed to split audio file into chunks")
+        
+        return ' '.join(full_transcription[i] for i in range(len(futures)))
+
+    def transcribe_audio(self, audio_file, max_workers=1, pipelined=False, in_memory=False, report=None):
+        """Transcribe an audio file to text, handling files larger than the API limit
 
-    def transcribe_audio(self, audio_file):
-        """Transcribe an audio file to text, handling files larger than the API limit"""
+        If a `report` dict is given, it is filled with per-job details such as
+        `silence_removed_seconds`, the `offset_map` for stripped audio and
+        whether the result came from the cache (`cached`).
+        """
+        cache_key = None
+        if self.result_cache:
+            cache_params = {
+                'speech_codec': self.speech_codec,
+                'speech_bitrate': self.speech_bitrate,
+                'speech_sample_rate': self.speech_sample_rate,
+                'strip_silence': self.strip_silence,
+                'silence_threshold_db': self.silence_threshold_db,
+                'min_silence_seconds': self.min_silence_seconds,
+            }
+            cache_key = self.result_cache.make_key(audio_file, "whisper-1", cache_params)
+            record = self.result_cache.get(cache_key)
+            details = (record or {}).get('details') or {}
+            if self.strip_silence and 'offset_map' not in details:
+                # Results cached without their offset map can't honour the report contract
+                record = None
+            if report is not None:
+                report['cached'] = record is not None
+            if record is not None:
+                print("\nReturning cached transcription")
+                if report is not None and 'offset_map' in details:
+                    kept_ranges = details['offset_map']
+                    report['silence_removed_seconds'] = details['silence_removed_seconds']
+                    report['offset_map'] = OffsetMap(kept_ranges) if kept_ranges is not None else None
+                return record['text']
+        
+        # Always collect the job details so a cache hit can restore them
+        job_report = {}
+        text = self.transcribe_audio_uncached(audio_file, max_workers, pipelined, in_memory, job_report)
+        if report is not None:
+            report.update(job_report)
+        if cache_key and text is not None:
+            details = {}
+            if 'offset_map' in job_report:
+                offset_map = job_report['offset_map']
+                details = {
+                    'silence_removed_seconds': job_report['silence_removed_seconds'],
+                    'offset_map': offset_map.kept_ranges if offset_map is not None else None,
+                }
+            self.result_cache.put(cache_key, text, details)
+        return text
+
+    def transcribe_audio_uncached(self, audio_file, max_workers=1, pipelined=False, in_memory=False, report=None):
+        """Transcribe an audio file through the API, bypassing the result cache"""
+        budget = RetryBudget(self.job_retry_budget)
+        chunks = []
+        transcoded_file = None
         try:
+            if self.strip_silence:
+                transcoded_file, offset_map, removed_seconds = self.strip_silences(audio_file)
+                if report is not None:
+                    report['silence_removed_seconds'] = removed_seconds
+                    report['offset_map'] = offset_map
+            if self.speech_codec and not transcoded_file:
+                transcoded_file = self.transcode_for_speech(audio_file)
+            if transcoded_file:
+                audio_file = transcoded_file
+            
             file_size = os.path.getsize(audio_file)
             max_size = 25 * 1024 * 1024  # 25MB in bytes
             
             if file_size > max_size:
                 print(f"\nFile size ({file_size / 1024 / 1024:.2f}MB) exceeds API limit. Splitting into chunks...")
+                if in_memory:
+                    return self.transcribe_chunks_in_memory(audio_file, max_workers=max_workers, budget=budget)
+                if pipelined:
+                    return self.transcribe_chunks_pipelined(audio_file, max_workers=max_workers, budget=budget)
+                
                 chunks = self.split_audio(audio_file)
                 
                 if not chunks:
                     raise Exception("Failed to split audio file into chunks")
                     
-                full_transcription = []
+                # Results go back into their original slots so the join keeps chunk order
+                full_transcription = [None] * len(chunks)
                 
-                for i, chunk_path in enumerate(chunks, 1):
-                    max_retries = 3
-                    retry_count = 0
-                    
-                    while retry_count < max_retries:
-                        try:
-                            print(f"\nTranscribing chunk {i} of {len(chunks)}...")
-                            with open(chunk_path, "rb") as audio_file:
-                                response = self.client.audio.transcriptions.create(
-                                    model="whisper-1",
-                                    file=audio_file,
-                                    timeout=60
-                                )
-                                full_transcription.append(response.text)
-                                break
-                        except Exception as e:
-                            retry_count += 1
-                            print(f"Error on chunk {i} (attempt {retry_count}): {str(e)}")
-                            if retry_count == max_retries:
-                                print(f"Failed to transcribe chunk {i} after {max_retries} attempts")
-                                raise
-                            print(f"Retrying in 5 seconds...")
-                            time.sleep(5)
-                    
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(
+                            self.transcribe_chunk, chunk_path, i + 1, len(chunks), budget=budget, duration=duration
+                        ): i
+                        for i, (chunk_path, duration) in enumerate(chunks)
+                    }
                     try:
-                        os.unlink(chunk_path)
-                    except Exception as e:
-                        print(f"Warning: Could not delete temporary file {chunk_path}: {e}")
+                        for future in as_completed(futures):
+                            i = futures[future]
+                            text, elapsed = future.result()
+                            print(f"Chunk {i + 1} of {len(chunks)} transcribed in {elapsed:.2f}s")
+                            full_transcription[i] = text
+                    except Exception:
+                        # The job has failed, so don't pay for uploads that haven't started yet
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        raise
                 
                 return ' '.join(full_transcription)
             else:
+                duration = self.get_audio_duration(audio_file)
+                self.acquire_whisper_slot(duration, desc="transcribing")
                 print("\nTranscribing audio...")
-                with open(audio_file, "rb") as audio_file:
+                with self.whisper_limiter.slot(work=duration / 60 if duration else 1.0), \
+                        open(audio_file, "rb") as audio_file:
                     response = self.client.audio.transcriptions.create(
                         model="whisper-1",
                         file=audio_file,
@@ -209,6 +1601,19 @@ class MediaProcessorService:
             import traceback
             print(f"Traceback: {traceback.format_exc()}")
             return None
+        finally:
+            for chunk_path, _ in chunks:
+                self.cleanup_temp_files(chunk_path)
+            if transcoded_file:
+                self.cleanup_temp_files(transcoded_file)
+
+    def concurrency_metrics(self):
+        """Current adaptive limits and recent decisions for the Whisper and chat calls"""
+        return {
+            'whisper': self.whisper_limiter.metrics(),
+            'chat': self.chat_limiter.metrics(),
+            'hedging': self.hedge_policy.metrics() if self.hedge_policy else None,
+        }
 
     def cleanup_temp_files(self, file_path):
         """Clean up temporary files and directories"""